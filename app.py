@@ -3,83 +3,841 @@
 Flask 기반 Databricks Apps 배포용 애플리케이션
 """
 import os
+import sys
 import uuid
+import gzip
+import shutil
+import hmac
+import random
+import hashlib
+import mimetypes
+import atexit
+import queue
 import logging
+import logging.handlers
 import json
-from datetime import datetime, timedelta
+import threading
+import contextvars
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, g, render_template, request, jsonify, send_from_directory
 import requests
 import re
 
 from config import Config
 
+try:
+    import brotli  # 선택 의존성: 없으면 gzip만 사용
+except ImportError:
+    brotli = None
+
+# 현재 요청 ID (로그 레코드에 주입)
+request_id_var = contextvars.ContextVar('request_id', default='-')
+
+# 현재 요청의 라우트 규칙, 그리고 요청을 처리 중인 스레드 → 라우트 (프로파일러 라우트별 집계용)
+request_route_var = contextvars.ContextVar('request_route', default=None)
+active_routes = {}
+
+
+def bind_request_context(fn, context=None):
+    """
+    fn을 요청 컨텍스트(기본: 호출 시점 컨텍스트의 복사본)에서 실행하는 함수로 감싼다.
+    백그라운드/풀 스레드에서도 요청 ID가 로그에 남고, 실행 중에는 프로파일러가 그 스레드를
+    요청 라우트로 집계한다. 컨텍스트는 한 번에 한 스레드만 진입할 수 있으므로 작업마다 새로 감싼다.
+    """
+    context = (context or contextvars.copy_context()).copy()
+    
+    def run(*args, **kwargs):
+        route = context.get(request_route_var)
+        thread_id = threading.get_ident()
+        if route:
+            active_routes[thread_id] = route
+        try:
+            return context.run(fn, *args, **kwargs)
+        finally:
+            if route:
+                active_routes.pop(thread_id, None)
+    return run
+
+
+class RequestContextFilter(logging.Filter):
+    """로그 레코드에 현재 요청 ID를 붙인다 (로그를 남기는 스레드에서 실행)"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    extra={'sampled': True}로 표시된 반복 로그를 메시지 템플릿별로 N건당 1건만 통과시킨다.
+    토큰/요청 단위로 반복되는 로그가 로그 볼륨을 지배하지 않도록 하기 위함.
+    """
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(1, int(every))
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.every == 1 or not getattr(record, 'sampled', False):
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        if count % self.every:
+            return False
+        record.sample_rate = self.every
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄짜리 JSON 로그 포맷터"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'msg': record.getMessage(),
+        }
+        if getattr(record, 'sample_rate', None):
+            entry['sample_rate'] = record.sample_rate
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    레코드를 포맷하지 않고 큐에 넣는 핸들러.
+    메시지 포맷팅과 I/O는 QueueListener 스레드에서 수행한다.
+    """
+
+    _IMMUTABLE_ARG_TYPES = (str, int, float, bool, type(None))
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # 변경 가능한 객체(dict, list 등)는 나중에 바뀔 수 있으므로 지금 포맷한다
+        args = record.args
+        if args:
+            values = args.values() if isinstance(args, dict) else args
+            if not all(isinstance(v, self._IMMUTABLE_ARG_TYPES) for v in values):
+                record.msg = record.getMessage()
+                record.args = None
+        return record
+
+    def enqueue(self, record):
+        # 큐가 가득 차면 요청 스레드를 막지 않고 버린다
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging():
+    """큐 기반 비동기 로깅 설정 (요청 스레드에서는 큐 삽입만 수행)"""
+    level = getattr(logging, str(Config.LOG_LEVEL).upper(), logging.INFO)
+
+    stream_handler = logging.StreamHandler()
+    if Config.LOG_FORMAT == 'json':
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+        ))
+
+    log_queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(SamplingFilter(Config.LOG_SAMPLE_EVERY))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    return queue_handler
+
+
 # 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+log_handler = configure_logging()
 logger = logging.getLogger(__name__)
 
-# Flask 앱 초기화
-app = Flask(__name__)
+# Flask 앱 초기화 (정적 파일은 StaticAssetPipeline이 직접 서빙)
+STATIC_DIR = Path(__file__).resolve().parent / 'static'
+app = Flask(__name__, static_folder=None)
 app.config.from_object(Config)
+app.json.ensure_ascii = False  # 한글을 \uXXXX(6바이트) 대신 UTF-8(3바이트)로 직렬화
 app.secret_key = os.environ.get('SECRET_KEY', os.urandom(24).hex())
 
+class Message:
+    """대화 메시지 1건 (역할 문자열은 intern, 시각은 epoch float로 보관)"""
+    
+    __slots__ = ('seq', 'role', 'content', 'created')
+    
+    def __init__(self, seq, role, content, created):
+        self.seq = seq
+        self.role = sys.intern(role)
+        self.content = content
+        self.created = created
+    
+    def to_dict(self):
+        """JSON 응답용 (ISO 시각 문자열은 이 시점에만 생성)"""
+        return {
+            'seq': self.seq,
+            'role': self.role,
+            'content': self.content,
+            'timestamp': datetime.fromtimestamp(self.created).isoformat()
+        }
+    
+    def to_record(self):
+        return [self.seq, self.role, self.content, self.created]
+    
+    @classmethod
+    def from_record(cls, record):
+        return cls(*record)
+
+
+class FileRef:
+    """세션에 첨부된 업로드 파일 정보"""
+    
+    __slots__ = ('filename', 'path', 'size_mb', 'warning')
+    
+    def __init__(self, filename, path, size_mb, warning=None):
+        self.filename = filename
+        self.path = path
+        self.size_mb = size_mb
+        self.warning = warning
+    
+    @classmethod
+    def from_dict(cls, file_info):
+        return cls(file_info['filename'], file_info['path'], file_info['size_mb'], file_info.get('warning'))
+    
+    def to_dict(self):
+        file_info = {'filename': self.filename, 'path': self.path, 'size_mb': self.size_mb}
+        if self.warning:
+            file_info['warning'] = self.warning
+        return file_info
+
+
+class Session:
+    """채팅 세션 (세션 수가 많을 때 워커 메모리를 줄이기 위해 __slots__ 사용)"""
+    
+    __slots__ = ('id', 'created_at', 'last_access', 'history', 'uploaded_files', 'version', 'message_seq')
+    
+    def __init__(self, session_id, created_at):
+        self.id = session_id
+        self.created_at = created_at  # epoch seconds
+        self.last_access = created_at  # epoch seconds
+        self.history = []  # list[Message]
+        self.uploaded_files = []  # list[FileRef]
+        self.version = 0  # 히스토리/파일 변경 시 증가 (ETag)
+        self.message_seq = 0  # 마지막 메시지 번호 (페이지네이션 커서)
+    
+    def copy(self):
+        """스냅샷용 복사 (Message/FileRef는 추가 후 변경되지 않으므로 리스트만 복사)"""
+        session = Session(self.id, self.created_at)
+        session.last_access = self.last_access
+        session.history = list(self.history)
+        session.uploaded_files = list(self.uploaded_files)
+        session.version = self.version
+        session.message_seq = self.message_seq
+        return session
+    
+    def uploaded_file_dicts(self):
+        return [file_ref.to_dict() for file_ref in self.uploaded_files]
+    
+    def to_record(self):
+        return {
+            'id': self.id,
+            'created_at': self.created_at,
+            'last_access': self.last_access,
+            'version': self.version,
+            'message_seq': self.message_seq,
+            'history': [message.to_record() for message in self.history],
+            'uploaded_files': self.uploaded_file_dicts()
+        }
+    
+    @classmethod
+    def from_record(cls, record):
+        session = cls(record['id'], record['created_at'])
+        session.last_access = record['last_access']
+        session.version = record['version']
+        session.message_seq = record['message_seq']
+        session.history = [Message.from_record(message) for message in record['history']]
+        session.uploaded_files = [FileRef.from_dict(file_info) for file_info in record['uploaded_files']]
+        return session
+
+
 # 세션 저장소 (실제 운영 시 Redis 등 사용 권장)
 chat_sessions = {}
 
 
+class SessionJournal:
+    """
+    세션 이벤트 append-only 저널 (재시작/배포 후 세션 복구용)
+    
+    이벤트(생성 c, 메시지 m, 파일 f, 만료 x)를 한 줄짜리 JSON으로 journal.log에 추가하고,
+    일정 건수마다 전체 세션 스냅샷(snapshot.jsonl, 세션당 한 줄)을 쓰고 저널을 비운다.
+    시작 시 최신 스냅샷 + 저널 tail을 재생하여 chat_sessions를 재구성한다.
+    각 이벤트는 적용 후 세션 버전(v)을 가지므로, 스냅샷과 저널이 겹쳐도 재생은 멱등이다.
+    단일 프로세스(python app.py) 기준이며, 여러 워커가 같은 디렉토리를 공유하면 안 된다.
+    
+    세션 변경은 `with session_journal.lock:` 안에서 버전 증가와 append를 함께 수행해야 한다.
+    그렇지 않으면 스레드 간에 v4가 v3보다 먼저 기록되어 재생 시 v3가 건너뛰어질 수 있다.
+    """
+    
+    SNAPSHOT_FILE = 'snapshot.jsonl'
+    JOURNAL_FILE = 'journal.log'
+    ROTATED_JOURNAL_FILE = 'journal.old.log'  # 압축(compaction) 진행 중인 이전 저널
+    
+    def __init__(self, directory):
+        self.enabled = bool(directory)
+        self.directory = Path(directory) if directory else None
+        self._lock = threading.RLock()  # 세션 변경 + append를 묶기 위해 재진입 가능
+        self._file = None
+        self._events_since_snapshot = 0
+        self._compacting = False
+    
+    @property
+    def lock(self):
+        """세션 변경과 이벤트 기록을 원자적으로 묶는 락 (저널 비활성화 시에도 사용)"""
+        return self._lock
+    
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.directory / self.JOURNAL_FILE, 'a', encoding='utf-8')
+    
+    def append(self, record):
+        """이벤트 1건 기록 (OS 버퍼까지 flush하여 프로세스 종료에도 유지)"""
+        if not self.enabled:
+            return
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._open()
+            self._file.write(line)
+            self._file.flush()
+            self._events_since_snapshot += 1
+            should_compact = (not self._compacting and
+                              self._events_since_snapshot >= Config.SESSION_JOURNAL_COMPACT_EVENTS)
+            if should_compact:
+                self._compacting = True
+        if should_compact:
+            threading.Thread(target=self.compact, name='session-journal-compact', daemon=True).start()
+    
+    def compact(self):
+        """현재 세션 상태 스냅샷 기록 후 이전 저널 삭제"""
+        try:
+            with self._lock:
+                # 락 안에서는 리스트 복사만 하고 직렬화는 락 밖에서 수행
+                sessions = [session.copy() for session in list(chat_sessions.values())]
+                if self._file is not None:
+                    self._file.close()
+                    # 아래 회전이 실패해도 다음 append가 저널을 다시 열도록 즉시 비움
+                    self._file = None
+                journal_path = self.directory / self.JOURNAL_FILE
+                rotated_path = self.directory / self.ROTATED_JOURNAL_FILE
+                if journal_path.exists():
+                    if rotated_path.exists():
+                        # 이전 압축이 중단된 경우 기존 이전 저널 뒤에 이어 붙임
+                        with open(rotated_path, 'a', encoding='utf-8') as dst, \
+                                open(journal_path, encoding='utf-8') as src:
+                            shutil.copyfileobj(src, dst)
+                        journal_path.unlink()
+                    else:
+                        os.replace(journal_path, rotated_path)
+                self._open()
+                self._events_since_snapshot = 0
+            
+            tmp_path = self.directory / (self.SNAPSHOT_FILE + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for session in sessions:
+                    f.write(json.dumps(session.to_record(), ensure_ascii=False, separators=(',', ':')))
+                    f.write('\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.directory / self.SNAPSHOT_FILE)
+            (self.directory / self.ROTATED_JOURNAL_FILE).unlink(missing_ok=True)
+            logger.info("세션 스냅샷 기록 완료: %d개 세션", len(sessions))
+        except Exception as e:
+            logger.error("세션 저널 압축 오류: %s", e)
+        finally:
+            with self._lock:
+                self._compacting = False
+    
+    def recover(self, sessions):
+        """스냅샷 + 저널 재생으로 세션 복구"""
+        if not self.enabled or not self.directory.is_dir():
+            return
+        started = time.perf_counter()
+        events = 0
+        
+        snapshot_path = self.directory / self.SNAPSHOT_FILE
+        if snapshot_path.exists():
+            with open(snapshot_path, encoding='utf-8') as f:
+                for line in f:
+                    session = Session.from_record(json.loads(line))
+                    sessions[session.id] = session
+        
+        for name in (self.ROTATED_JOURNAL_FILE, self.JOURNAL_FILE):
+            path = self.directory / name
+            if not path.exists():
+                continue
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 비정상 종료로 잘린 마지막 줄
+                        logger.warning("손상된 저널 레코드 무시: %.100s", line)
+                        continue
+                    SessionManager.apply_record(sessions, record)
+                    events += 1
+        
+        elapsed = time.perf_counter() - started
+        logger.info("세션 복구 완료: %d개 세션, 저널 %d건, %.2fs", len(sessions), events, elapsed)
+        if elapsed > Config.SESSION_JOURNAL_REPLAY_BUDGET_SEC:
+            logger.warning("세션 복구 시간이 예산(%.1fs)을 초과했습니다", Config.SESSION_JOURNAL_REPLAY_BUDGET_SEC)
+        
+        # 재생한 저널을 스냅샷으로 합쳐 다음 시작을 빠르게 함
+        if events:
+            with self._lock:
+                self._compacting = True
+            threading.Thread(target=self.compact, name='session-journal-compact', daemon=True).start()
+
+
+session_journal = SessionJournal(Config.SESSION_JOURNAL_DIR)
+
+
 class SessionManager:
     """세션 및 채팅 히스토리 관리"""
     
+    @staticmethod
+    def _append_message(session, message):
+        session.history.append(message)
+        
+        # 최대 턴 수 제한
+        max_turns = Config.MAX_HISTORY_TURNS * 2  # user + assistant 각각
+        if len(session.history) > max_turns:
+            session.history = session.history[-max_turns:]
+    
+    @staticmethod
+    def create_session():
+        """새 세션 생성"""
+        session_id = str(uuid.uuid4())
+        now = time.time()
+        with session_journal.lock:
+            chat_sessions[session_id] = Session(session_id, now)
+            session_journal.append({'op': 'c', 'sid': session_id, 't': now})
+        logger.info("새 세션 생성: %s", session_id)
+        return session_id, chat_sessions[session_id]
+    
     @staticmethod
     def get_or_create_session(session_id=None):
         """세션 가져오기 또는 생성"""
         if not session_id or session_id not in chat_sessions:
-            session_id = str(uuid.uuid4())
-            chat_sessions[session_id] = {
-                'id': session_id,
-                'created_at': datetime.now(),
-                'last_access': datetime.now(),
-                'history': [],
-                'uploaded_files': []
-            }
-            logger.info(f"새 세션 생성: {session_id}")
-        else:
-            chat_sessions[session_id]['last_access'] = datetime.now()
+            return SessionManager.create_session()
         
+        chat_sessions[session_id].last_access = time.time()
         return session_id, chat_sessions[session_id]
     
     @staticmethod
     def add_to_history(session_id, role, content):
         """히스토리에 대화 추가"""
-        if session_id in chat_sessions:
-            chat_sessions[session_id]['history'].append({
-                'role': role,
-                'content': content,
-                'timestamp': datetime.now().isoformat()
+        with session_journal.lock:
+            session = chat_sessions.get(session_id)
+            if session is None:
+                return
+            session.message_seq += 1
+            message = Message(session.message_seq, role, content, time.time())
+            SessionManager._append_message(session, message)
+            session.version += 1
+            session_journal.append({
+                'op': 'm', 'sid': session_id, 'v': session.version, 'msg': message.to_record()
             })
-            
-            # 최대 턴 수 제한
-            max_turns = Config.MAX_HISTORY_TURNS * 2  # user + assistant 각각
-            if len(chat_sessions[session_id]['history']) > max_turns:
-                chat_sessions[session_id]['history'] = \
-                    chat_sessions[session_id]['history'][-max_turns:]
+    
+    @staticmethod
+    def add_uploaded_file(session_id, file_info):
+        """세션에 업로드 파일 정보 추가"""
+        with session_journal.lock:
+            session = chat_sessions.get(session_id)
+            if session is None:
+                return
+            session.uploaded_files.append(FileRef.from_dict(file_info))
+            session.version += 1
+            session_journal.append({'op': 'f', 'sid': session_id, 'v': session.version, 'file': file_info})
+    
+    @staticmethod
+    def etag(session_id):
+        """세션 버전 기반 ETag 값"""
+        return f"{session_id}-{chat_sessions[session_id].version}"
     
     @staticmethod
     def clear_old_sessions():
         """만료된 세션 정리"""
-        now = datetime.now()
-        timeout = timedelta(minutes=Config.SESSION_TIMEOUT_MINUTES)
+        cutoff = time.time() - Config.SESSION_TIMEOUT_MINUTES * 60
         expired = [
-            sid for sid, data in chat_sessions.items()
-            if now - data['last_access'] > timeout
+            sid for sid, session in chat_sessions.items()
+            if session.last_access < cutoff
         ]
         for sid in expired:
-            del chat_sessions[sid]
-            logger.info(f"만료된 세션 삭제: {sid}")
+            with session_journal.lock:
+                if chat_sessions.pop(sid, None) is None:
+                    continue
+                session_journal.append({'op': 'x', 'sid': sid})
+            logger.info("만료된 세션 삭제: %s", sid)
+    
+    @staticmethod
+    def apply_record(sessions, record):
+        """저널 이벤트 1건 재생 (이미 반영된 버전은 건너뜀)"""
+        op = record['op']
+        sid = record['sid']
+        if op == 'c':
+            if sid not in sessions:
+                sessions[sid] = Session(sid, record['t'])
+            return
+        if op == 'x':
+            sessions.pop(sid, None)
+            return
+        
+        session = sessions.get(sid)
+        if session is None or record['v'] <= session.version:
+            return
+        if op == 'm':
+            message = Message.from_record(record['msg'])
+            SessionManager._append_message(session, message)
+            session.message_seq = message.seq
+            session.last_access = message.created
+        elif op == 'f':
+            session.uploaded_files.append(FileRef.from_dict(record['file']))
+        session.version = record['v']
+
+
+# 재시작 시 세션 복구
+session_journal.recover(chat_sessions)
+
+
+class CancelToken:
+    """
+    업스트림 요청 취소 토큰.
+    다른 스레드에서 cancel()을 호출하면 연결된 응답을 닫아 더 이상 생성 결과를 읽지 않는다.
+    """
+    
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._response = None
+    
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+    
+    def attach(self, response):
+        """취소 시 닫을 업스트림 응답 등록 (이미 취소된 경우 즉시 닫음)"""
+        with self._lock:
+            self._response = response
+            cancelled = self._event.is_set()
+        if cancelled:
+            response.close()
+    
+    def cancel(self):
+        with self._lock:
+            self._event.set()
+            response = self._response
+        if response is not None:
+            response.close()
+    
+    def wait(self, timeout):
+        """최대 timeout초 대기, 그 사이 취소되면 True"""
+        return self._event.wait(timeout)
+
+
+class RetryBudget:
+    """
+    토큰 버킷 재시도 예산.
+    요청마다 ratio만큼 토큰을 적립하고 재시도마다 1개를 소모하므로, 재시도는 전체 트래픽의
+    ratio 비율을 넘지 않는다. 트래픽이 적을 때를 위해 초당 min_per_sec개는 시간으로 적립한다.
+    """
+    
+    def __init__(self, ratio, min_per_sec, max_tokens):
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, amount):
+        now = time.monotonic()
+        self._tokens = min(
+            self.max_tokens,
+            self._tokens + amount + (now - self._updated) * self.min_per_sec
+        )
+        self._updated = now
+    
+    def deposit(self):
+        with self._lock:
+            self._refill(self.ratio)
+    
+    def withdraw(self):
+        with self._lock:
+            self._refill(0)
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RetryPolicy:
+    """
+    업스트림(Agent, Files API) 공용 재시도 정책
+    
+    - 429/502/503 응답과 연결 실패만 재시도 (읽기 타임아웃은 서버가 이미 처리 중일 수 있어 제외)
+    - 504도 같은 이유(게이트웨이 타임아웃 뒤에서 업스트림이 이미 생성 중일 수 있음)로
+      멱등 메서드(GET/PUT 등 - Files API 목록/업로드)에서만 재시도한다. 호출별로 retry_statuses 지정 가능
+    - 지수 백오프 + full jitter, Retry-After 헤더가 있으면 우선 (max_delay 초과 시 재시도하지 않음)
+    - RetryBudget 토큰이 없으면 재시도하지 않고 마지막 응답/오류를 그대로 반환
+    - 응답 본문을 읽기 전에만 재시도한다. 스트리밍 응답은 상태 코드 확인 후 호출자에게
+      넘어가므로 첫 바이트 이후에는 절대 재전송되지 않는다.
+    """
+    
+    RETRYABLE_STATUS = {429, 502, 503}
+    IDEMPOTENT_RETRYABLE_STATUS = RETRYABLE_STATUS | {504}
+    IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+    
+    def __init__(self, max_attempts, base_delay, max_delay, budget):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+    
+    def _retry_after(self, response):
+        """Retry-After 헤더(초 또는 HTTP 날짜)를 초 단위로 변환"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    
+    def _delay(self, attempt, response=None):
+        """다음 시도까지 대기 시간 (재시도하지 않아야 하면 None)"""
+        retry_after = self._retry_after(response) if response is not None else None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+    
+    def request(self, method, url, cancel_token=None, retry_statuses=None, **kwargs):
+        """재시도를 적용한 requests 호출 (최종 응답 반환, 재시도 불가 오류는 그대로 발생)"""
+        if retry_statuses is None:
+            retry_statuses = (self.IDEMPOTENT_RETRYABLE_STATUS if method.upper() in self.IDEMPOTENT_METHODS
+                              else self.RETRYABLE_STATUS)
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            attempt += 1
+            response = None
+            try:
+                response = requests.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.ConnectTimeout) as e:
+                if attempt >= self.max_attempts:
+                    raise
+                error = e
+                delay = self._delay(attempt)
+            else:
+                if response.status_code not in retry_statuses or attempt >= self.max_attempts:
+                    return response
+                delay = self._delay(attempt, response)
+                if delay is None:
+                    return response
+            
+            if not self.budget.withdraw():
+                logger.warning("재시도 예산 소진: %s %s 재시도 생략", method, url)
+                if response is None:
+                    raise error
+                return response
+            
+            logger.warning(
+                "업스트림 재시도 %d/%d (%s): %.2fs 후",
+                attempt, self.max_attempts - 1,
+                response.status_code if response is not None else '연결 실패', delay
+            )
+            if response is not None:
+                response.close()
+            if cancel_token is not None:
+                if cancel_token.wait(delay):
+                    raise requests.exceptions.ConnectionError('요청이 취소되었습니다')
+            else:
+                time.sleep(delay)
+
+
+# Agent / Files API 공용 재시도 정책
+upstream_retry = RetryPolicy(
+    max_attempts=Config.RETRY_MAX_ATTEMPTS,
+    base_delay=Config.RETRY_BASE_DELAY_SEC,
+    max_delay=Config.RETRY_MAX_DELAY_SEC,
+    budget=RetryBudget(
+        ratio=Config.RETRY_BUDGET_RATIO,
+        min_per_sec=Config.RETRY_BUDGET_MIN_PER_SEC,
+        max_tokens=Config.RETRY_BUDGET_MAX_TOKENS
+    )
+)
+
+
+def databricks_host():
+    """Databricks 워크스페이스 URL (DATABRICKS_HOST, 없으면 AGENT_ENDPOINT_URL에서 파싱)"""
+    if Config.DATABRICKS_HOST:
+        host = Config.DATABRICKS_HOST.rstrip('/')
+        return host if '://' in host else f"https://{host}"
+    agent_url = Config.AGENT_ENDPOINT_URL
+    if '://' in agent_url:
+        host = agent_url.split('://')[1].split('/')[0]
+        return f"https://{host}"
+    raise ValueError(f"유효하지 않은 AGENT_ENDPOINT_URL: {agent_url}")
+
+
+class DatabricksCredentials:
+    """
+    Agent / Files API 공용 자격 증명 제공자
+    
+    - DATABRICKS_CLIENT_ID/SECRET이 있으면 Service Principal OAuth(M2M, client_credentials)로
+      액세스 토큰을 발급받아 캐시한다. 만료 OAUTH_REFRESH_MARGIN_SEC 전에 백그라운드 타이머로
+      미리 갱신하므로 요청 경로에서는 토큰 발급을 기다리지 않는다.
+    - 토큰이 없거나 만료된 경우에만 요청 스레드가 직접 갱신하며, 동시에 들어온 요청은
+      갱신 락에서 대기하다 같은 결과를 공유한다 (발급 호출 1회).
+    - OAuth 설정이 없으면 기존 PAT(DATABRICKS_TOKEN 등)를 그대로 사용한다.
+    """
+    
+    FAILURE_BACKOFF_SEC = 5.0
+    
+    def __init__(self, client_id, client_secret, token_url=None, refresh_margin=300):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.token_url = token_url
+        self.refresh_margin = refresh_margin
+        self._cached = None  # (토큰, 만료 시각 monotonic) - 한 번에 교체하여 읽는 쪽은 항상 일관된 쌍을 봄
+        self._refresh_lock = threading.Lock()
+        self._timer = None
+        self._last_error = None
+        self._failed_at = 0.0
+        self.fetch_count = 0
+    
+    @property
+    def uses_oauth(self):
+        return bool(self.client_id and self.client_secret)
+    
+    @staticmethod
+    def _static_token():
+        """PAT 해석 (Config.DATABRICKS_TOKEN > DATABRICKS_TOKEN > DATABRICKS_APP_TOKEN)"""
+        return (Config.DATABRICKS_TOKEN or
+                os.environ.get('DATABRICKS_TOKEN') or
+                os.environ.get('DATABRICKS_APP_TOKEN') or "")
+    
+    @staticmethod
+    def _valid(cached, margin=0.0):
+        return cached is not None and time.monotonic() < cached[1] - margin
+    
+    def get_token(self) -> str:
+        """현재 액세스 토큰 (OAuth 미설정 시 PAT, 없으면 빈 문자열)"""
+        if not self.uses_oauth:
+            return self._static_token()
+        cached = self._cached
+        if self._valid(cached):
+            return cached[0]
+        return self._refresh(blocking=True)
+    
+    def status(self):
+        """디버그용 상태 (토큰 값은 포함하지 않음)"""
+        if not self.uses_oauth:
+            return {'mode': 'pat'}
+        cached = self._cached
+        return {
+            'mode': 'oauth-m2m',
+            'token_cached': cached is not None,
+            'expires_in_sec': round(cached[1] - time.monotonic(), 1) if cached else None,
+            'fetch_count': self.fetch_count,
+            'last_error': str(self._last_error) if self._last_error else None
+        }
+    
+    def _refresh(self, blocking):
+        """토큰 갱신 (single-flight: 락을 얻은 뒤 다른 스레드가 이미 갱신했으면 그 결과 사용)"""
+        if not self._refresh_lock.acquire(blocking=blocking):
+            return None  # 다른 스레드가 갱신 중 (백그라운드 갱신만 해당)
+        try:
+            cached = self._cached
+            if self._valid(cached, margin=0.0 if blocking else self.refresh_margin):
+                return cached[0]
+            if blocking and self._last_error and time.monotonic() - self._failed_at < self.FAILURE_BACKOFF_SEC:
+                raise self._last_error
+            try:
+                self._fetch()
+            except Exception as e:
+                self._last_error = e
+                self._failed_at = time.monotonic()
+                if blocking:
+                    raise
+                logger.error("OAuth 토큰 백그라운드 갱신 실패: %s", e)
+                self._schedule(self.FAILURE_BACKOFF_SEC)
+                return None
+            return self._cached[0]
+        finally:
+            self._refresh_lock.release()
+    
+    def _fetch(self):
+        """client_credentials 그랜트로 액세스 토큰 발급"""
+        token_url = self.token_url or f"{databricks_host()}/oidc/v1/token"
+        response = upstream_retry.request(
+            'POST',
+            token_url,
+            auth=(self.client_id, self.client_secret),
+            data={'grant_type': 'client_credentials', 'scope': 'all-apis'},
+            timeout=30
+        )
+        if not response.ok:
+            raise ValueError(f"OAuth 토큰 발급 실패 (status {response.status_code}): {response.text[:200]}")
+        body = response.json()
+        expires_in = float(body.get('expires_in', 3600))
+        self._cached = (body['access_token'], time.monotonic() + expires_in)
+        self._last_error = None
+        self.fetch_count += 1
+        logger.info("OAuth 토큰 발급 완료 (만료까지 %.0fs)", expires_in)
+        # 만료 전 미리 갱신 (토큰 수명이 짧으면 수명의 절반 시점)
+        self._schedule(max(1.0, expires_in - min(self.refresh_margin, expires_in / 2)))
+    
+    def _schedule(self, delay):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._refresh, kwargs={'blocking': False})
+        self._timer.daemon = True
+        self._timer.start()
+
+
+credentials = DatabricksCredentials(
+    client_id=Config.DATABRICKS_CLIENT_ID,
+    client_secret=Config.DATABRICKS_CLIENT_SECRET,
+    token_url=Config.DATABRICKS_OAUTH_TOKEN_URL,
+    refresh_margin=Config.OAUTH_REFRESH_MARGIN_SEC
+)
 
 
 class DatabricksAgentClient:
@@ -88,24 +846,13 @@ class DatabricksAgentClient:
     def __init__(self):
         self.endpoint_url = Config.AGENT_ENDPOINT_URL
 
-    def _resolve_token(self) -> str:
-        """환경 변수에서 Databricks 토큰을 해석한다.
-        우선순위:
-        1) Config.DATABRICKS_TOKEN
-        2) 환경 변수 DATABRICKS_TOKEN
-        3) 환경 변수 DATABRICKS_APP_TOKEN (선택적 백업 키)
-        """
-        token = (Config.DATABRICKS_TOKEN or
-                 os.environ.get('DATABRICKS_TOKEN') or
-                 os.environ.get('DATABRICKS_APP_TOKEN'))
-        return token or ""
-
     def _build_headers(self, streaming=False) -> dict:
-        token = self._resolve_token()
+        token = credentials.get_token()
         if not token:
             raise ValueError(
                 "Databricks 토큰이 설정되지 않았습니다. "
-                "Apps 환경 변수에 DATABRICKS_TOKEN을 설정하세요 (예: {{secrets/<scope>/databricks-token}})."
+                "Apps 환경 변수에 DATABRICKS_CLIENT_ID/DATABRICKS_CLIENT_SECRET 또는 "
+                "DATABRICKS_TOKEN을 설정하세요 (예: {{secrets/<scope>/databricks-token}})."
             )
         headers = {
             'Authorization': f'Bearer {token}',
@@ -115,26 +862,34 @@ class DatabricksAgentClient:
             headers['Accept'] = 'text/event-stream'
         return headers
     
+    @staticmethod
+    def _build_input_messages(question, history):
+        """히스토리(Message 또는 dict) + 현재 질문을 Agent 입력 메시지 배열로 변환"""
+        messages = []
+        
+        # 히스토리 추가 (있는 경우)
+        for item in history or []:
+            if isinstance(item, Message):
+                messages.append({'role': item.role, 'content': item.content})
+            else:
+                messages.append({
+                    'role': item.get('role', 'user'),
+                    'content': item.get('content', '')
+                })
+        
+        # 현재 질문 추가
+        messages.append({
+            'role': 'user',
+            'content': question
+        })
+        return messages
+    
     def query(self, question, history=None, uploaded_files=None):
         """에이전트에 질의"""
         try:
             # Databricks Agent Framework 입력 형식
             # 'input' 필드에 메시지 배열 전달
-            messages = []
-            
-            # 히스토리 추가 (있는 경우)
-            if history:
-                for item in history:
-                    messages.append({
-                        'role': item.get('role', 'user'),
-                        'content': item.get('content', '')
-                    })
-            
-            # 현재 질문 추가
-            messages.append({
-                'role': 'user',
-                'content': question
-            })
+            messages = self._build_input_messages(question, history)
             
             # API 요청 페이로드 (input 필드 사용)
             payload = {
@@ -147,10 +902,11 @@ class DatabricksAgentClient:
                     'uploaded_files': uploaded_files
                 }
             
-            logger.info(f"Agent 호출: {question[:50]}...")
-            logger.debug(f"요청 페이로드: {payload}")
+            logger.info("Agent 호출: %.50s...", question)
+            logger.debug("요청 페이로드: %s", payload)
             
-            response = requests.post(
+            response = upstream_retry.request(
+                'POST',
                 self.endpoint_url,
                 json=payload,
                 headers=self._build_headers(),
@@ -159,7 +915,7 @@ class DatabricksAgentClient:
             
             if not response.ok:
                 error_detail = response.text
-                logger.error(f"Agent API 에러 (status {response.status_code}): {error_detail}")
+                logger.error("Agent API 에러 (status %s): %s", response.status_code, error_detail)
                 # 401 진단 메시지 보강
                 if response.status_code == 401:
                     logger.error(
@@ -173,32 +929,22 @@ class DatabricksAgentClient:
             return result
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Agent 호출 실패: {str(e)}")
+            logger.error("Agent 호출 실패: %s", e)
             raise Exception(f"Agent 호출 실패: {str(e)}")
         except ValueError as e:
             # 토큰 미설정 등 사전 검증 실패
             logger.error(str(e))
             raise
     
-    def query_stream(self, question, history=None, uploaded_files=None):
-        """에이전트에 스트리밍 질의 (제너레이터)"""
+    def query_stream(self, question, history=None, uploaded_files=None, cancel_token=None):
+        """
+        에이전트에 스트리밍 질의 (제너레이터)
+        cancel_token이 취소되거나 제너레이터가 닫히면 업스트림 응답을 즉시 닫는다.
+        """
+        response = None
         try:
             # Databricks Agent Framework 입력 형식
-            messages = []
-            
-            # 히스토리 추가 (있는 경우)
-            if history:
-                for item in history:
-                    messages.append({
-                        'role': item.get('role', 'user'),
-                        'content': item.get('content', '')
-                    })
-            
-            # 현재 질문 추가
-            messages.append({
-                'role': 'user',
-                'content': question
-            })
+            messages = self._build_input_messages(question, history)
             
             # API 요청 페이로드 (stream=true 추가)
             payload = {
@@ -212,21 +958,25 @@ class DatabricksAgentClient:
                     'uploaded_files': uploaded_files
                 }
             
-            logger.info(f"Agent 스트리밍 호출: {question[:50]}...")
-            logger.debug(f"요청 페이로드: {payload}")
+            logger.info("Agent 스트리밍 호출: %.50s...", question)
+            logger.debug("요청 페이로드: %s", payload)
             
-            # 스트리밍 요청
-            response = requests.post(
+            # 스트리밍 요청 (재시도는 상태 코드 확인 단계까지만, 본문 수신 후에는 재전송하지 않음)
+            response = upstream_retry.request(
+                'POST',
                 self.endpoint_url,
+                cancel_token=cancel_token,
                 json=payload,
                 headers=self._build_headers(streaming=True),
                 timeout=120,
                 stream=True  # requests 라이브러리의 스트리밍 모드
             )
+            if cancel_token is not None:
+                cancel_token.attach(response)
             
             if not response.ok:
                 error_detail = response.text
-                logger.error(f"Agent API 에러 (status {response.status_code}): {error_detail}")
+                logger.error("Agent API 에러 (status %s): %s", response.status_code, error_detail)
                 if response.status_code == 401:
                     logger.error(
                         "401 Unauthorized: 토큰이 누락/잘못되었습니다. "
@@ -236,6 +986,9 @@ class DatabricksAgentClient:
             
             # SSE 스트림 파싱 및 yield
             for line in response.iter_lines():
+                if cancel_token is not None and cancel_token.cancelled:
+                    logger.info("Agent 스트리밍 취소됨 (클라이언트 연결 종료)")
+                    return
                 if not line:
                     continue
                 
@@ -254,18 +1007,142 @@ class DatabricksAgentClient:
                         event_data = json.loads(data_str)
                         yield event_data
                     except json.JSONDecodeError as e:
-                        logger.warning(f"JSON 파싱 실패: {data_str[:100]}")
+                        logger.warning("JSON 파싱 실패: %.100s", data_str, extra={'sampled': True})
                         continue
             
             logger.info("Agent 스트리밍 응답 수신 완료")
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Agent 스트리밍 호출 실패: {str(e)}")
+            if cancel_token is not None and cancel_token.cancelled:
+                # 취소로 인해 연결이 닫힌 경우는 오류가 아님
+                return
+            logger.error("Agent 스트리밍 호출 실패: %s", e)
             raise Exception(f"Agent 스트리밍 호출 실패: {str(e)}")
         except ValueError as e:
             # 토큰 미설정 등 사전 검증 실패
             logger.error(str(e))
             raise
+        finally:
+            # 정상 종료/취소/GeneratorExit 모두에서 업스트림 연결 해제
+            if response is not None:
+                response.close()
+
+    @staticmethod
+    def extract_answer(result):
+        """
+        비스트리밍 응답에서 답변 텍스트 추출 (Databricks Agent 응답 형식에 따라 유연하게 처리)
+        반환값: (answer, parse_format)
+        """
+        logger.debug("응답 파싱 시작, 응답 키: %s", list(result.keys()))
+        answer = ''
+        
+        # 응답 형식 1: choices 배열 (OpenAI 스타일)
+        if 'choices' in result and len(result['choices']) > 0:
+            choice = result['choices'][0]
+            if 'message' in choice:
+                answer = choice['message'].get('content', '')
+            elif 'text' in choice:
+                answer = choice['text']
+            parse_format = 'choices'
+        # 응답 형식 2: 직접 content 필드
+        elif 'content' in result:
+            answer = result['content']
+            parse_format = 'content'
+        # 응답 형식 3: answer 필드 (기존 형식)
+        elif 'answer' in result:
+            answer = result['answer']
+            parse_format = 'answer'
+        # 응답 형식 4: message 필드
+        elif 'message' in result:
+            answer = result['message']
+            parse_format = 'message'
+        # 응답 형식 5: output 필드 (Databricks Agent Framework)
+        elif 'output' in result:
+            output = result['output']
+            if isinstance(output, dict):
+                answer = output.get('content', '') or output.get('text', '') or str(output)
+            elif isinstance(output, str):
+                answer = output
+            elif isinstance(output, list) and len(output) > 0:
+                # output 리스트에서 최종 메시지 찾기 (역순으로 검색)
+                for item in reversed(output):
+                    if isinstance(item, dict):
+                        # type이 'message'이고 role이 'assistant'인 항목 찾기
+                        if item.get('type') == 'message' and item.get('role') == 'assistant':
+                            content = item.get('content', [])
+                            if isinstance(content, list):
+                                # content 배열에서 text 추출
+                                text_parts = []
+                                for content_item in content:
+                                    if isinstance(content_item, dict):
+                                        if 'text' in content_item:
+                                            text_parts.append(content_item['text'])
+                                answer = '\n\n'.join(text_parts)
+                                if answer:
+                                    break
+                        # 또는 직접 content/text 필드가 있는 경우
+                        elif 'content' in item:
+                            answer = item['content']
+                            break
+                        elif 'text' in item:
+                            answer = item['text']
+                            break
+                
+                # 답변을 찾지 못한 경우 첫 번째 항목 사용 (fallback)
+                if not answer and len(output) > 0:
+                    answer = str(output[0])
+            parse_format = 'output'
+        else:
+            logger.warning("알 수 없는 응답 형식. 전체 응답: %s", result)
+            parse_format = 'unknown'
+            answer = str(result)
+        
+        return answer, parse_format
+
+    @staticmethod
+    def extract_delta_text(event):
+        """스트리밍 이벤트에서 delta 텍스트 추출 (Databricks Agent / OpenAI 형식)"""
+        delta_text = ''
+        
+        # Databricks Agent 응답 형식 파싱
+        if 'delta' in event:
+            delta = event['delta']
+            if isinstance(delta, dict):
+                delta_text = delta.get('text', '') or delta.get('content', '')
+            elif isinstance(delta, str):
+                delta_text = delta
+        
+        # 또는 직접 content 필드
+        elif 'content' in event:
+            content = event['content']
+            if isinstance(content, list):
+                # content 배열에서 text 추출
+                for item in content:
+                    if isinstance(item, dict) and 'text' in item:
+                        delta_text += item['text']
+            elif isinstance(content, dict):
+                delta_text = content.get('text', '')
+            elif isinstance(content, str):
+                delta_text = content
+        
+        # 또는 choices (OpenAI 스타일)
+        elif 'choices' in event and len(event['choices']) > 0:
+            choice = event['choices'][0]
+            if 'delta' in choice:
+                delta_text = choice['delta'].get('content', '')
+            elif 'text' in choice:
+                delta_text = choice['text']
+        
+        return delta_text
+
+
+def file_sha256(path):
+    """파일 내용 SHA-256 (청크 단위로 읽음)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
 class VolumeUploader:
@@ -309,11 +1186,10 @@ class VolumeUploader:
     
     def __init__(self):
         base_path_str = Config.VOLUME_BASE_PATH
-        logger.info(f"VolumeUploader 초기화 시작: VOLUME_BASE_PATH={base_path_str}")
+        logger.info("VolumeUploader 초기화 시작: VOLUME_BASE_PATH=%s", base_path_str)
         
-        # Databricks Apps 환경 감지 (DATABRICKS_TOKEN이 있으면 Databricks 환경)
-        self.is_databricks = bool(os.environ.get('DATABRICKS_TOKEN'))
-        self.databricks_host = os.environ.get('DATABRICKS_HOST', '')
+        # Databricks Apps 환경 감지 (DATABRICKS_TOKEN 또는 OAuth 자격 증명이 있으면 Databricks 환경)
+        self.is_databricks = bool(os.environ.get('DATABRICKS_TOKEN')) or credentials.uses_oauth
         
         # Volume 경로 설정
         if base_path_str.startswith('/Volumes'):
@@ -321,7 +1197,7 @@ class VolumeUploader:
             self.use_files_api = self.is_databricks
             
             if self.use_files_api:
-                logger.info(f"Databricks Files API 모드: volume_path={self.volume_path}")
+                logger.info("Databricks Files API 모드: volume_path=%s", self.volume_path)
                 # 로컬 임시 저장소 사용 (업로드 전 임시 저장)
                 self.local_temp_path = Path('/tmp/uploads')
                 self.local_temp_path.mkdir(parents=True, exist_ok=True)
@@ -337,19 +1213,54 @@ class VolumeUploader:
             self.local_temp_path = Path(base_path_str)
             self.local_temp_path.mkdir(parents=True, exist_ok=True)
             self.use_files_api = False
-            logger.info(f"로컬 파일 시스템 모드: path={self.local_temp_path}")
+            logger.info("로컬 파일 시스템 모드: path=%s", self.local_temp_path)
         
         self.allowed_extensions = Config.ALLOWED_FILE_TYPES
         self.max_size_mb = Config.MAX_UPLOAD_MB
         
-        logger.info(f"VolumeUploader 초기화 완료: use_files_api={self.use_files_api}, "
-                   f"local_temp_path={self.local_temp_path}, volume_path={self.volume_path}")
+        # 업로드 완료 콜백 (path, size_bytes, content_hash) - 파일 인덱스 갱신용
+        self.on_uploaded = None
+        
+        logger.info("VolumeUploader 초기화 완료: use_files_api=%s, local_temp_path=%s, volume_path=%s",
+                    self.use_files_api, self.local_temp_path, self.volume_path)
     
     def is_allowed_file(self, filename):
         """허용된 파일 형식 확인"""
         return '.' in filename and \
                filename.rsplit('.', 1)[1].lower() in self.allowed_extensions
     
+    @staticmethod
+    def _files_api_headers():
+        token = credentials.get_token()
+        if not token:
+            raise ValueError("Databricks 토큰이 설정되지 않았습니다")
+        return {
+            'Authorization': f'Bearer {token}',
+        }
+    
+    def list_directory_page(self, directory_path, page_token=None):
+        """
+        Files API 디렉토리 목록 1페이지 조회
+        GET /api/2.0/fs/directories{path}
+        반환값: (contents, next_page_token)
+        """
+        params = {'page_size': Config.VOLUME_LIST_PAGE_SIZE}
+        if page_token:
+            params['page_token'] = page_token
+        response = upstream_retry.request(
+            'GET',
+            f"{databricks_host()}/api/2.0/fs/directories{directory_path}",
+            headers=self._files_api_headers(),
+            params=params,
+            timeout=60
+        )
+        if response.status_code == 404:
+            return [], None
+        if not response.ok:
+            raise Exception(f"Files API 목록 조회 실패 (status {response.status_code}): {response.text}")
+        body = response.json()
+        return body.get('contents', []), body.get('next_page_token')
+    
     def _upload_to_volume_via_api(self, local_file_path, volume_file_path):
         """Databricks Files API를 사용하여 Volume에 파일 업로드"""
         try:
@@ -357,36 +1268,23 @@ class VolumeUploader:
             # PUT /api/2.0/fs/files{path}
             # 참고: https://docs.databricks.com/api/workspace/files/upload
             
-            token = os.environ.get('DATABRICKS_TOKEN')
-            if not token:
-                raise ValueError("DATABRICKS_TOKEN이 설정되지 않았습니다")
-            
-            # Databricks 호스트 URL 추출 (AGENT_ENDPOINT_URL에서 파싱)
-            agent_url = Config.AGENT_ENDPOINT_URL
-            if '://' in agent_url:
-                host = agent_url.split('://')[1].split('/')[0]
-                databricks_host = f"https://{host}"
-            else:
-                raise ValueError(f"유효하지 않은 AGENT_ENDPOINT_URL: {agent_url}")
+            headers = self._files_api_headers()
             
             # Files API URL 구성
             # /api/2.0/fs/files 엔드포인트 사용
             # URL 인코딩하지 않고 직접 전달 (Databricks가 자동으로 처리)
-            api_url = f"{databricks_host}/api/2.0/fs/files{volume_file_path}"
-            
-            headers = {
-                'Authorization': f'Bearer {token}',
-            }
+            api_url = f"{databricks_host()}/api/2.0/fs/files{volume_file_path}"
             
             # 파일 읽기
             with open(local_file_path, 'rb') as f:
                 file_content = f.read()
             
-            logger.info(f"Files API 업로드 시작: {api_url}")
-            logger.info(f"Volume 경로: {volume_file_path}")
+            logger.info("Files API 업로드 시작: %s", api_url)
+            logger.info("Volume 경로: %s", volume_file_path)
             
-            # PUT 요청으로 파일 업로드
-            response = requests.put(
+            # PUT 요청으로 파일 업로드 (같은 경로 덮어쓰기라 재시도 안전)
+            response = upstream_retry.request(
+                'PUT',
                 api_url,
                 headers=headers,
                 data=file_content,
@@ -395,18 +1293,18 @@ class VolumeUploader:
             
             if not response.ok:
                 error_detail = response.text
-                logger.error(f"Files API 업로드 실패 (status {response.status_code}): {error_detail}")
+                logger.error("Files API 업로드 실패 (status %s): %s", response.status_code, error_detail)
                 raise Exception(f"Files API 업로드 실패: {error_detail}")
             
-            logger.info(f"Files API 업로드 완료: {volume_file_path}")
+            logger.info("Files API 업로드 완료: %s", volume_file_path)
             return True
             
         except Exception as e:
-            logger.error(f"Files API 업로드 오류: {str(e)}")
+            logger.error("Files API 업로드 오류: %s", e)
             raise
     
-    def upload_file(self, file, session_id):
-        """파일 업로드"""
+    def validate_file(self, file):
+        """파일 검증 (형식, 크기) - 반환값: (저장 파일명, 크기 MB)"""
         if not file or file.filename == '':
             raise ValueError("파일이 없습니다")
         
@@ -429,24 +1327,30 @@ class VolumeUploader:
         
         # 안전한 파일명 (원본 유지)
         filename = self.safe_filename(file.filename)
-        logger.info(f"원본 파일명: {file.filename} → 저장 파일명: {filename}")
-        
-        # 1단계: 로컬 임시 저장
+        logger.info("원본 파일명: %s → 저장 파일명: %s", file.filename, filename)
+        return filename, size_mb
+    
+    def save_local(self, file, session_id, filename):
+        """1단계: 로컬 임시 저장 - 반환값: (로컬 경로, 크기 bytes, SHA-256)"""
         session_dir = self.local_temp_path / "uploads" / session_id
         session_dir.mkdir(parents=True, exist_ok=True)
         
         local_file_path = session_dir / filename
         file.save(str(local_file_path))
-        logger.info(f"로컬 임시 저장 완료: {local_file_path}")
-        
-        # 2단계: Volume 경로 결정 및 업로드
+        logger.info("로컬 임시 저장 완료: %s", local_file_path)
+        return local_file_path, local_file_path.stat().st_size, file_sha256(local_file_path)
+    
+    def publish(self, local_file_path, session_id, filename, size_mb, size_bytes, content_hash):
+        """2단계: Volume 경로 결정 및 업로드 (실패 시 로컬 경로로 폴백)"""
         if self.use_files_api:
             # Databricks Files API 사용
             volume_file_path = f"{self.volume_path}/uploads/{session_id}/{filename}"
             
             try:
                 self._upload_to_volume_via_api(str(local_file_path), volume_file_path)
-                logger.info(f"Volume 업로드 완료: {volume_file_path}")
+                logger.info("Volume 업로드 완료: %s", volume_file_path)
+                if self.on_uploaded:
+                    self.on_uploaded(volume_file_path, size_bytes, content_hash)
                 
                 # 임시 파일 삭제 (선택사항)
                 # local_file_path.unlink()
@@ -457,7 +1361,7 @@ class VolumeUploader:
                     'size_mb': round(size_mb, 2)
                 }
             except Exception as e:
-                logger.error(f"Volume 업로드 실패: {str(e)}")
+                logger.error("Volume 업로드 실패: %s", e)
                 # 폴백: 로컬 경로 반환
                 logger.warning("폴백: 로컬 임시 경로 반환")
                 return {
@@ -468,22 +1372,542 @@ class VolumeUploader:
                 }
         else:
             # 로컬 개발 환경 - 로컬 파일 사용
+            if self.on_uploaded:
+                self.on_uploaded(str(local_file_path), size_bytes, content_hash)
             return {
                 'filename': filename,
                 'path': str(local_file_path),
                 'size_mb': round(size_mb, 2)
             }
+    
+    def upload_file(self, file, session_id):
+        """파일 업로드"""
+        filename, size_mb = self.validate_file(file)
+        local_file_path, size_bytes, content_hash = self.save_local(file, session_id, filename)
+        return self.publish(local_file_path, session_id, filename, size_mb, size_bytes, content_hash)
+
+
+class VolumeFileIndex:
+    """
+    Volume uploads/ 아래 파일 메타데이터 인덱스 (경로, 크기, 수정 시각, 내용 해시)
+    
+    Files API 디렉토리 목록(페이지 단위)을 백그라운드에서 순회하여 채우고, 이 앱의 업로드는
+    즉시 반영한다. 조회는 메모리에서 바로 응답하며, TTL이 지나면 응답은 그대로 하고
+    백그라운드에서 재검증한다 (stale-while-revalidate).
+    Files API 목록에는 내용 해시가 없으므로, 해시는 이 앱이 업로드한 파일(및 로컬 모드)에만 채워진다.
+    """
+    
+    def __init__(self, uploader, ttl):
+        self.uploader = uploader
+        self.ttl = ttl
+        self.entries = {}  # path -> {'path', 'size', 'modified', 'content_hash'}
+        self.version = 0
+        # 버전은 프로세스마다 0부터 시작하므로, 재시작 전 ETag와 겹치지 않도록 인스턴스 식별자를 붙인다
+        self.instance_id = uuid.uuid4().hex[:12]
+        self.refreshed_at = None  # epoch seconds
+        self._checked_at = 0.0  # monotonic
+        self._refreshing = False
+        self._lock = threading.Lock()
+    
+    @property
+    def root(self):
+        if self.uploader.use_files_api:
+            return f"{self.uploader.volume_path}/uploads"
+        return str(self.uploader.local_temp_path / 'uploads')
+    
+    def record_upload(self, path, size, content_hash):
+        """이 앱에서 업로드한 파일을 인덱스에 즉시 반영"""
+        with self._lock:
+            # listed=False: 아직 목록 조회로 확인되지 않음 (modified는 원격 수정 시각이 아닌 업로드 시각)
+            self.entries[path] = {
+                'path': path, 'size': size, 'modified': time.time(), 'content_hash': content_hash,
+                'listed': False
+            }
+            self.version += 1
+    
+    def snapshot(self):
+        """현재 인덱스 (오래되었으면 백그라운드 재검증 시작)"""
+        with self._lock:
+            stale = time.monotonic() - self._checked_at > self.ttl
+            if stale and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self.refresh, name='volume-index-refresh', daemon=True).start()
+            return list(self.entries.values()), self.version, self.refreshed_at
+    
+    def _list_files_api(self):
+        """Files API로 uploads/ 이하 재귀 목록 조회 (디렉토리별 페이지네이션)"""
+        directories = [self.root]
+        while directories:
+            directory = directories.pop()
+            page_token = None
+            while True:
+                contents, page_token = self.uploader.list_directory_page(directory, page_token)
+                for item in contents:
+                    if item.get('is_directory'):
+                        directories.append(item['path'].rstrip('/'))
+                    else:
+                        modified = item.get('last_modified')
+                        yield item['path'], item.get('file_size', 0), modified / 1000 if modified else None
+                if not page_token:
+                    break
+    
+    def _list_local(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                stat = os.stat(path)
+                yield path, stat.st_size, stat.st_mtime
+    
+    def refresh(self):
+        """
+        전체 목록으로 인덱스 재구성
+        기존 해시는 크기와 수정 시각이 모두 같을 때만 유지한다. 로컬 모드는 그 외에는 다시 해시하고,
+        Files API 모드는 이 앱이 방금 업로드해 아직 목록에서 확인되지 않은 파일만 크기 비교로 유지한다
+        (업로드 시 기록한 시각은 원격 수정 시각과 다르므로).
+        """
+        try:
+            with self._lock:
+                previous = dict(self.entries)
+            use_files_api = self.uploader.use_files_api
+            listing = self._list_files_api() if use_files_api else self._list_local()
+            entries = {}
+            for path, size, modified in listing:
+                known = previous.get(path)
+                unchanged = bool(known and known['content_hash'] and known['size'] == size and (
+                    known['modified'] == modified or (use_files_api and not known.get('listed', True))
+                ))
+                if unchanged:
+                    content_hash = known['content_hash']
+                elif not use_files_api:
+                    content_hash = file_sha256(path)
+                else:
+                    content_hash = None
+                entries[path] = {
+                    'path': path, 'size': size, 'modified': modified, 'content_hash': content_hash, 'listed': True
+                }
+            
+            with self._lock:
+                # 목록 조회 중 업로드된 파일 유지
+                for path, entry in self.entries.items():
+                    if previous.get(path) is not entry:
+                        entries[path] = entry
+                changed = entries != self.entries
+                self.entries = entries
+                if changed:
+                    self.version += 1
+                self.refreshed_at = time.time()
+            logger.info("Volume 파일 인덱스 갱신: %d개 파일", len(entries))
+        except Exception as e:
+            logger.error("Volume 파일 인덱스 갱신 실패: %s", e)
+        finally:
+            with self._lock:
+                self._checked_at = time.monotonic()
+                self._refreshing = False
+
+
+class AgentStream:
+    """
+    Agent 스트리밍 응답 1건.
+    업스트림은 백그라운드 스레드에서 수신하고, 생성된 SSE 프레임은 이벤트 ID와 함께
+    제한된 크기의 재생 버퍼에 보관한다. 클라이언트는 Last-Event-ID로 재연결하여
+    Agent를 다시 호출하지 않고 이어서 받을 수 있다.
+    """
+    
+    def __init__(self, session_id, turn, question, history, uploaded_files):
+        self.stream_id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.turn = turn
+        self.question = question
+        self.history = history
+        self.uploaded_files = uploaded_files
+        
+        self.events = deque(maxlen=Config.STREAM_REPLAY_BUFFER)  # (seq, payload_json)
+        self.session_frame = json.dumps(
+            {'type': 'session', 'session_id': session_id, 'stream_id': self.stream_id}
+        )
+        self.last_seq = 1  # seq 1은 session 프레임 (버퍼와 별도로 보관하여 늦게 붙은 구독자도 항상 받음)
+        self.text_seq = 0  # accumulated_text에 마지막으로 반영된 delta의 seq
+        self.accumulated_text = ''
+        self.done = False
+        self.finished_at = None
+        self.subscribers = 0
+        
+        self.cancel_token = CancelToken()
+        self._cond = threading.Condition()
+        # 요청 스레드의 컨텍스트(요청 ID, 라우트)를 이어받아 업스트림 로그/프로파일도 같은 요청으로 묶이게 함
+        self._thread = threading.Thread(
+            target=bind_request_context(self._run),
+            name=f'agent-stream-{self.stream_id[:8]}', daemon=True
+        )
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def _publish(self, payload, delta_text=''):
+        data = json.dumps(payload, ensure_ascii=False)
+        with self._cond:
+            self.last_seq += 1
+            self.events.append((self.last_seq, data))
+            if delta_text:
+                self.accumulated_text += delta_text
+                self.text_seq = self.last_seq
+            self._cond.notify_all()
+    
+    def _run(self):
+        """업스트림 수신 루프 (백그라운드 스레드)"""
+        upstream = agent_client.query_stream(
+            question=self.question,
+            history=self.history,
+            uploaded_files=self.uploaded_files,
+            cancel_token=self.cancel_token
+        )
+        try:
+            for event in upstream:
+                event_type = event.get('event_type') or event.get('type')
+                delta_text = DatabricksAgentClient.extract_delta_text(event)
+                
+                # 텍스트가 있으면 전송
+                if delta_text:
+                    logger.debug("delta 수신: %d chars", len(delta_text), extra={'sampled': True})
+                    self._publish({'type': 'delta', 'text': delta_text}, delta_text)
+                
+                # 완료 이벤트 확인
+                if event_type in ['response.completed', 'message.completed', 'done']:
+                    logger.info("스트리밍 완료 이벤트 수신")
+                    break
+            
+            if self.cancel_token.cancelled:
+                logger.info("구독자가 없어 Agent 스트림 취소: %s", self.stream_id)
+                self._publish({'type': 'error', 'error': '스트림이 취소되었습니다'})
+                return
+            
+            # 응답 히스토리 추가
+            SessionManager.add_to_history(self.session_id, 'assistant', self.accumulated_text)
+            
+            # 완료 신호
+            self._publish({'type': 'done', 'full_text': self.accumulated_text})
+            
+        except Exception as e:
+            logger.error("스트리밍 처리 오류: %s", e)
+            self._publish({'type': 'error', 'error': str(e)})
+        finally:
+            upstream.close()
+            with self._cond:
+                self.done = True
+                self.finished_at = time.monotonic()
+                self._cond.notify_all()
+    
+    def subscribe(self, last_event_id=0):
+        """
+        SSE 프레임 제너레이터.
+        last_event_id 이후 프레임을 재생한 뒤 실시간 프레임을 전달하고, 대기 중에는
+        하트비트 주석을 보내 끊어진 클라이언트를 감지한다.
+        """
+        with self._cond:
+            self.subscribers += 1
+        try:
+            cursor = last_event_id
+            while True:
+                with self._cond:
+                    if not self.done and self.last_seq <= cursor:
+                        self._cond.wait(timeout=Config.STREAM_HEARTBEAT_SEC)
+                    pending = self._frames_after(cursor)
+                    finished = self.done
+                
+                for seq, data in pending:
+                    yield f"id: {seq}\ndata: {data}\n\n"
+                    cursor = seq
+                
+                if not pending:
+                    if finished:
+                        yield "data: [DONE]\n\n"
+                        return
+                    yield ": heartbeat\n\n"
+        finally:
+            self._unsubscribe()
+    
+    def _frames_after(self, cursor):
+        """cursor 이후 프레임 목록 (self._cond 보유 상태에서 호출)"""
+        frames = [(1, self.session_frame)] if cursor < 1 else []
+        if self.events and self.events[0][0] > max(cursor, 1) + 1 and cursor < self.text_seq:
+            # 재생 버퍼에서 밀려난 구간은 누적 텍스트 스냅샷으로 대체
+            snapshot = json.dumps({'type': 'snapshot', 'text': self.accumulated_text}, ensure_ascii=False)
+            return frames + [(self.text_seq, snapshot)] + [
+                (seq, data) for seq, data in self.events if seq > self.text_seq
+            ]
+        return frames + [(seq, data) for seq, data in self.events if seq > cursor]
+    
+    def _unsubscribe(self):
+        with self._cond:
+            self.subscribers -= 1
+            orphaned = self.subscribers == 0 and not self.done
+        if orphaned:
+            # 재연결 유예 시간 내에 아무도 돌아오지 않으면 업스트림 취소
+            timer = threading.Timer(Config.STREAM_RESUME_GRACE_SEC, self._cancel_if_orphaned)
+            timer.daemon = True
+            timer.start()
+    
+    def _cancel_if_orphaned(self):
+        with self._cond:
+            orphaned = self.subscribers == 0 and not self.done
+        if orphaned:
+            self.cancel_token.cancel()
+
+
+class StreamRegistry:
+    """
+    Agent 스트림 브로커.
+    진행 중인 생성은 (session_id, turn) 키로 보관하여, 같은 세션의 여러 탭이나 새로고침한
+    클라이언트가 새 Agent 호출 없이 기존 업스트림 스트림에 구독자로 붙는다.
+    업스트림은 마지막 구독자가 떠난 뒤에만 취소된다 (AgentStream 참조).
+    """
+    
+    def __init__(self):
+        self._streams = {}  # stream_id -> AgentStream (완료 후 보관 기간 동안 유지)
+        self._inflight = {}  # (session_id, turn) -> AgentStream
+        self._turns = {}  # session_id -> 마지막 turn 번호
+        self._lock = threading.Lock()
+    
+    def get_or_create(self, session_id, question, prepare_turn):
+        """
+        같은 세션에서 같은 질문으로 진행 중인 스트림이 있으면 반환하고,
+        없으면 prepare_turn()으로 (history, uploaded_files)를 받아 새 스트림을 시작한다.
+        반환값: (stream, created)
+        """
+        self.prune()
+        with self._lock:
+            for (sid, _), stream in self._inflight.items():
+                if sid == session_id and stream.question == question and not stream.done:
+                    return stream, False
+            
+            history, uploaded_files = prepare_turn()
+            turn = self._turns.get(session_id, 0) + 1
+            self._turns[session_id] = turn
+            stream = AgentStream(session_id, turn, question, history, uploaded_files)
+            self._streams[stream.stream_id] = stream
+            self._inflight[(session_id, turn)] = stream
+        return stream.start(), True
+    
+    def get(self, stream_id):
+        with self._lock:
+            return self._streams.get(stream_id)
+    
+    def latest_inflight(self, session_id):
+        """세션에서 가장 최근에 시작된 진행 중 스트림"""
+        with self._lock:
+            streams = [
+                stream for (sid, _), stream in self._inflight.items()
+                if sid == session_id and not stream.done
+            ]
+        return max(streams, key=lambda stream: stream.turn) if streams else None
+    
+    def prune(self):
+        """완료된 스트림을 진행 중 목록에서 빼고, 보관 기간이 지난 스트림 삭제"""
+        cutoff = time.monotonic() - Config.STREAM_RETENTION_SEC
+        with self._lock:
+            for key in [key for key, stream in self._inflight.items() if stream.done]:
+                del self._inflight[key]
+            expired = [
+                sid for sid, stream in self._streams.items()
+                if stream.done and stream.finished_at < cutoff
+            ]
+            for sid in expired:
+                del self._streams[sid]
+            active_sessions = {stream.session_id for stream in self._streams.values()}
+            for sid in [sid for sid in self._turns if sid not in active_sessions]:
+                del self._turns[sid]
 
 
 # 클라이언트 인스턴스
 agent_client = DatabricksAgentClient()
 uploader = VolumeUploader()
+agent_streams = StreamRegistry()
+volume_index = VolumeFileIndex(uploader, ttl=Config.VOLUME_INDEX_TTL_SEC)
+uploader.on_uploaded = volume_index.record_upload
+volume_index.snapshot()  # 시작 시 백그라운드 목록 조회
+
+
+@app.before_request
+def assign_request_id():
+    """요청 ID 할당 (업스트림 프록시가 보낸 X-Request-ID가 있으면 재사용)"""
+    g.request_id_token = request_id_var.set(request.headers.get('X-Request-ID') or uuid.uuid4().hex)
+
+
+@app.after_request
+def add_request_id_header(response):
+    """
+    응답 헤더에 요청 ID 노출.
+    워커 스레드가 재사용되어도 이전 요청 ID가 요청 밖 로그에 남지 않도록 응답이 닫힐 때 되돌린다
+    (스트리밍 응답은 본문 생성 중에도 요청 ID로 로그를 남기므로 teardown이 아닌 close 시점).
+    """
+    response.headers['X-Request-ID'] = request_id_var.get()
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        response.call_on_close(lambda: request_id_var.reset(token))
+    return response
+
+
+# 압축 대상 응답 (SSE 스트림은 프레임 지연을 피하기 위해 압축하지 않음)
+COMPRESSIBLE_MIMETYPES = {'application/json'}
+
+
+def _negotiate_encoding():
+    """
+    Accept-Encoding 협상 (q값 존중, 같으면 gzip 우선)
+    동적 JSON(주로 수 KB 답변)은 gzip-5가 저지연 brotli 품질보다 작고 빠르므로
+    (benchmarks/bench_compression.py), brotli는 gzip을 받지 않는 클라이언트에만 사용한다.
+    """
+    candidates = ['gzip', 'br'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(candidates)
+
+
+@app.after_request
+def compress_response(response):
+    """JSON 응답 압축 (COMPRESS_MIN_BYTES 이상일 때 gzip/brotli)"""
+    if (response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < Config.COMPRESS_MIN_BYTES:
+        return response
+    
+    encoding = _negotiate_encoding()
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=Config.COMPRESS_BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        compressed = gzip.compress(data, compresslevel=Config.COMPRESS_GZIP_LEVEL, mtime=0)
+    else:
+        return response
+    
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    
+    # 인코딩이 다른 표현은 바이트가 다르므로 ETag를 약한 ETag로 변경
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+class StaticAsset:
+    """메모리에 올린 정적 자산 (원본 + 사전 압축본)"""
+    
+    # 이미 압축된 형식(이미지, woff2 등)은 다시 압축하지 않음
+    COMPRESSIBLE_PREFIXES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+    
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.mimetype = mimetype
+        self.digest = hashlib.sha256(body).hexdigest()
+        self.encoded = {}  # content-coding -> bytes
+        if mimetype.startswith(self.COMPRESSIBLE_PREFIXES) and len(body) >= Config.COMPRESS_MIN_BYTES:
+            # 빌드 시 1회만 수행하므로 최대 압축 레벨 사용 (협상 시 brotli 우선)
+            if brotli is not None:
+                self.encoded['br'] = brotli.compress(body, quality=11)
+            self.encoded['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+
+
+class StaticAssetPipeline:
+    """
+    static/ 파일을 시작 시 1회 읽어 내용 해시로 지문을 붙이고 gzip/brotli로 사전 압축한다.
+    지문이 붙은 URL은 내용이 바뀌면 URL도 바뀌므로 immutable로 장기 캐시한다.
+    디버그 모드에서는 지문을 붙이지 않고 파일을 매번 디스크에서 서빙한다 (serve_static 참조).
+    """
+    
+    def __init__(self, static_dir):
+        self.static_dir = Path(static_dir)
+        self.assets = {}  # 지문 파일명 -> StaticAsset
+        self.fingerprints = {}  # 원본 파일명 -> 지문 파일명
+        self.originals = {}  # 지문 파일명 -> 원본 파일명
+        self.pages = {}  # 렌더링된 템플릿 캐시
+    
+    def build(self):
+        if not self.static_dir.is_dir():
+            return self
+        for path in sorted(self.static_dir.rglob('*')):
+            if not path.is_file():
+                continue
+            filename = path.relative_to(self.static_dir).as_posix()
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            asset = StaticAsset(path.read_bytes(), mimetype)
+            stem, dot, ext = filename.rpartition('.')
+            hashed = f"{stem}.{asset.digest[:12]}.{ext}" if dot else f"{filename}.{asset.digest[:12]}"
+            self.assets[hashed] = asset
+            self.fingerprints[filename] = hashed
+            self.originals[hashed] = filename
+        logger.info("정적 자산 빌드 완료: %d개 파일", len(self.assets))
+        return self
+    
+    def page(self, template_name):
+        """렌더링된 템플릿을 자산으로 캐시 (디버그 모드에서는 매번 렌더링)"""
+        asset = None if app.debug else self.pages.get(template_name)
+        if asset is None:
+            asset = StaticAsset(render_template(template_name).encode('utf-8'), 'text/html; charset=utf-8')
+            if not app.debug:
+                self.pages[template_name] = asset
+        return asset
+    
+    @staticmethod
+    def response(asset, cache_control):
+        """ETag/Accept-Encoding을 반영한 응답 (If-None-Match 일치 시 304)"""
+        encoding = request.accept_encodings.best_match(list(asset.encoded)) if asset.encoded else None
+        
+        if request.if_none_match.contains_weak(asset.digest):
+            response = app.response_class(status=304)
+        else:
+            response = app.response_class(asset.encoded.get(encoding, asset.body), mimetype=asset.mimetype)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        
+        response.set_etag(asset.digest, weak=bool(encoding))
+        response.headers['Cache-Control'] = cache_control
+        if asset.encoded:
+            response.vary.add('Accept-Encoding')
+        return response
+
+
+static_assets = StaticAssetPipeline(STATIC_DIR).build()
+
+
+@app.url_defaults
+def fingerprint_static_url(endpoint, values):
+    """url_for('static', filename=...)가 지문이 붙은 URL을 만들도록 변환 (디버그 모드 제외)"""
+    if endpoint == 'static' and 'filename' in values and not app.debug:
+        values['filename'] = static_assets.fingerprints.get(values['filename'], values['filename'])
+
+
+@app.route('/static/<path:filename>', endpoint='static')
+def serve_static(filename):
+    """정적 파일 서빙 (지문 URL은 1년 immutable 캐시)"""
+    if app.debug:
+        # 디버그 모드에서는 시작 시 빌드한 자산 대신 수정 중인 파일을 매번 디스크에서 읽음
+        # (이전에 받은 지문 URL도 현재 파일로 응답)
+        return send_from_directory(STATIC_DIR, static_assets.originals.get(filename, filename), max_age=0)
+    
+    asset = static_assets.assets.get(filename)
+    if asset is not None:
+        return StaticAssetPipeline.response(asset, 'public, max-age=31536000, immutable')
+    
+    # 지문 없는 원본 경로 (하위 호환): 매번 재검증
+    hashed = static_assets.fingerprints.get(filename)
+    if hashed is not None:
+        return StaticAssetPipeline.response(static_assets.assets[hashed], 'no-cache')
+    
+    # 시작 이후 추가된 파일
+    return send_from_directory(STATIC_DIR, filename)
 
 
 @app.route('/')
 def index():
-    """메인 페이지"""
-    return render_template('index.html')
+    """메인 페이지 (렌더링 결과 캐시, ETag로 재검증)"""
+    return StaticAssetPipeline.response(static_assets.page('index.html'), 'no-cache')
 
 
 @app.route('/api/chat', methods=['POST'])
@@ -506,75 +1930,14 @@ def chat():
         # Agent 호출
         result = agent_client.query(
             question=question,
-            history=session_data['history'][:-1],  # 현재 질문 제외
-            uploaded_files=session_data['uploaded_files']
+            history=session_data.history[:-1],  # 현재 질문 제외
+            uploaded_files=session_data.uploaded_file_dicts()
         )
         
         # 응답 파싱 (Databricks Agent 응답 형식에 따라 유연하게 처리)
-        logger.info(f"응답 파싱 시작, 응답 키: {list(result.keys())}")
-        answer = ''
-        
-        # 응답 형식 1: choices 배열 (OpenAI 스타일)
-        if 'choices' in result and len(result['choices']) > 0:
-            choice = result['choices'][0]
-            if 'message' in choice:
-                answer = choice['message'].get('content', '')
-            elif 'text' in choice:
-                answer = choice['text']
-            logger.info(f"choices 형식으로 파싱: {answer[:100] if answer else '(empty)'}")
-        # 응답 형식 2: 직접 content 필드
-        elif 'content' in result:
-            answer = result['content']
-            logger.info(f"content 형식으로 파싱: {answer[:100] if answer else '(empty)'}")
-        # 응답 형식 3: answer 필드 (기존 형식)
-        elif 'answer' in result:
-            answer = result['answer']
-            logger.info(f"answer 형식으로 파싱: {answer[:100] if answer else '(empty)'}")
-        # 응답 형식 4: message 필드
-        elif 'message' in result:
-            answer = result['message']
-            logger.info(f"message 형식으로 파싱: {answer[:100] if answer else '(empty)'}")
-        # 응답 형식 5: output 필드 (Databricks Agent Framework)
-        elif 'output' in result:
-            output = result['output']
-            if isinstance(output, dict):
-                answer = output.get('content', '') or output.get('text', '') or str(output)
-            elif isinstance(output, str):
-                answer = output
-            elif isinstance(output, list) and len(output) > 0:
-                # output 리스트에서 최종 메시지 찾기 (역순으로 검색)
-                for item in reversed(output):
-                    if isinstance(item, dict):
-                        # type이 'message'이고 role이 'assistant'인 항목 찾기
-                        if item.get('type') == 'message' and item.get('role') == 'assistant':
-                            content = item.get('content', [])
-                            if isinstance(content, list):
-                                # content 배열에서 text 추출
-                                text_parts = []
-                                for content_item in content:
-                                    if isinstance(content_item, dict):
-                                        if 'text' in content_item:
-                                            text_parts.append(content_item['text'])
-                                answer = '\n\n'.join(text_parts)
-                                if answer:
-                                    break
-                        # 또는 직접 content/text 필드가 있는 경우
-                        elif 'content' in item:
-                            answer = item['content']
-                            break
-                        elif 'text' in item:
-                            answer = item['text']
-                            break
-                
-                # 답변을 찾지 못한 경우 첫 번째 항목 사용 (fallback)
-                if not answer and len(output) > 0:
-                    answer = str(output[0])
-            logger.info(f"output 형식으로 파싱: {answer[:100] if answer else '(empty)'}")
-        else:
-            logger.warning(f"알 수 없는 응답 형식. 전체 응답: {result}")
-            answer = str(result)
-        
-        logger.info(f"최종 답변 길이: {len(answer)} chars")
+        answer, parse_format = DatabricksAgentClient.extract_answer(result)
+        logger.debug("%s 형식으로 파싱: %.100s", parse_format, answer or '(empty)')
+        logger.info("최종 답변 길이: %d chars", len(answer))
         
         # 응답 히스토리 추가
         SessionManager.add_to_history(session_id, 'assistant', answer)
@@ -586,109 +1949,213 @@ def chat():
         })
         
     except Exception as e:
-        logger.error(f"채팅 처리 오류: {str(e)}")
+        logger.error("채팅 처리 오류: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
+# 배치 요청 전체에서 동시에 진행되는 Agent 호출 수 제한 (업스트림 한도 보호)
+batch_upstream_slots = threading.BoundedSemaphore(Config.BATCH_UPSTREAM_CONCURRENCY)
+
+
+def _parse_batch_items(data):
+    """배치 요청 본문 검증 (모두 통과해야 실행)"""
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError('items 배열이 필요합니다')
+    if len(items) > Config.BATCH_MAX_ITEMS:
+        raise ValueError(f'한 번에 최대 {Config.BATCH_MAX_ITEMS}개까지 요청할 수 있습니다')
+    
+    parsed = []
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            item = {'question': item}
+        if not isinstance(item, dict):
+            raise ValueError(f'items[{index}]: 문자열 또는 객체여야 합니다')
+        question = str(item.get('question', '')).strip()
+        if not question:
+            raise ValueError(f'items[{index}]: 질문을 입력해주세요')
+        history = item.get('history') or []
+        if not isinstance(history, list):
+            raise ValueError(f'items[{index}]: history는 배열이어야 합니다')
+        for turn, entry in enumerate(history):
+            if not (isinstance(entry, dict)
+                    and isinstance(entry.get('role'), str)
+                    and isinstance(entry.get('content'), str)):
+                raise ValueError(f'items[{index}].history[{turn}]: role/content 문자열을 가진 객체여야 합니다')
+        uploaded_files = item.get('uploaded_files') or []
+        if not isinstance(uploaded_files, list) or not all(isinstance(f, dict) for f in uploaded_files):
+            raise ValueError(f'items[{index}]: uploaded_files는 객체 배열이어야 합니다')
+        parsed.append({
+            'index': index,
+            'id': item.get('id', index),
+            'question': question,
+            'history': history,
+            'uploaded_files': uploaded_files
+        })
+    return parsed
+
+
+def _run_batch_item(item):
+    """배치 항목 1건 실행 (지연 시간/오류 포함 결과 반환)"""
+    started = time.perf_counter()
+    result = {'type': 'result', 'index': item['index'], 'id': item['id']}
+    try:
+        with batch_upstream_slots:
+            response = agent_client.query(
+                question=item['question'],
+                history=item['history'],
+                uploaded_files=item['uploaded_files']
+            )
+        answer, _ = DatabricksAgentClient.extract_answer(response)
+        result.update({'status': 'ok', 'answer': answer})
+    except Exception as e:
+        result.update({'status': 'error', 'error': str(e)})
+    result['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+@app.route('/api/chat/batch', methods=['POST'])
+def chat_batch():
+    """
+    배치 질의 (평가용)
+    
+    요청: {"items": [{"id": ..., "question": "...", "history": [...]}, ...], "concurrency": N}
+    응답: NDJSON - 완료되는 순서대로 항목별 결과 한 줄씩, 마지막에 요약 한 줄.
+    세션 히스토리에는 기록하지 않는다.
+    """
+    try:
+        data = request.get_json(silent=True)
+        items = _parse_batch_items(data)
+        concurrency = int(data.get('concurrency') or Config.BATCH_MAX_CONCURRENCY)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    concurrency = max(1, min(concurrency, Config.BATCH_MAX_CONCURRENCY, len(items)))
+    
+    logger.info("배치 질의 시작: %d건 (동시 %d)", len(items), concurrency)
+    # 작업 스레드에서도 요청 ID/라우트가 유지되도록 요청 컨텍스트를 항목별로 복사해 실행
+    context = contextvars.copy_context()
+    
+    def generate():
+        started = time.perf_counter()
+        succeeded = 0
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='batch-chat')
+        try:
+            futures = [executor.submit(bind_request_context(_run_batch_item, context), item) for item in items]
+            for future in as_completed(futures):
+                result = future.result()
+                succeeded += result['status'] == 'ok'
+                yield json.dumps(result, ensure_ascii=False) + '\n'
+            
+            summary = {
+                'type': 'summary',
+                'total': len(items),
+                'succeeded': succeeded,
+                'failed': len(items) - succeeded,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+            }
+            logger.info("배치 질의 완료: %d/%d 성공", succeeded, len(items))
+            yield json.dumps(summary, ensure_ascii=False) + '\n'
+        finally:
+            # 클라이언트가 끊긴 경우 아직 시작하지 않은 항목은 취소
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    return app.response_class(
+        generate(),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',  # Nginx 버퍼링 비활성화
+    'Connection': 'keep-alive'
+}
+
+
 @app.route('/api/chat/stream', methods=['POST'])
 def chat_stream():
     """채팅 메시지 스트리밍 처리 (SSE)"""
-    # request context 밖에서 데이터 읽기
     data = request.json
     question = data.get('question', '').strip()
     session_id = data.get('session_id')
     
-    def generate():
-        try:
-            if not question:
-                yield f"data: {json.dumps({'error': '질문을 입력해주세요'})}\n\n"
-                return
-            
-            # 세션 관리 (클로저 변수 충돌 방지를 위해 다른 이름 사용)
-            current_session_id, session_data = SessionManager.get_or_create_session(session_id)
-            
-            # 사용자 질문 히스토리 추가
-            SessionManager.add_to_history(current_session_id, 'user', question)
-            
-            # 세션 ID 전송
-            yield f"data: {json.dumps({'type': 'session', 'session_id': current_session_id})}\n\n"
-            
-            # 누적 응답 텍스트
-            accumulated_text = ''
-            
-            # Agent 스트리밍 호출
-            for event in agent_client.query_stream(
-                question=question,
-                history=session_data['history'][:-1],  # 현재 질문 제외
-                uploaded_files=session_data['uploaded_files']
-            ):
-                # 이벤트 타입별 처리
-                event_type = event.get('event_type') or event.get('type')
-                
-                # Delta 텍스트 추출
-                delta_text = ''
-                
-                # Databricks Agent 응답 형식 파싱
-                if 'delta' in event:
-                    delta = event['delta']
-                    if isinstance(delta, dict):
-                        delta_text = delta.get('text', '') or delta.get('content', '')
-                    elif isinstance(delta, str):
-                        delta_text = delta
-                
-                # 또는 직접 content 필드
-                elif 'content' in event:
-                    content = event['content']
-                    if isinstance(content, list):
-                        # content 배열에서 text 추출
-                        for item in content:
-                            if isinstance(item, dict) and 'text' in item:
-                                delta_text += item['text']
-                    elif isinstance(content, dict):
-                        delta_text = content.get('text', '')
-                    elif isinstance(content, str):
-                        delta_text = content
-                
-                # 또는 choices (OpenAI 스타일)
-                elif 'choices' in event and len(event['choices']) > 0:
-                    choice = event['choices'][0]
-                    if 'delta' in choice:
-                        delta_text = choice['delta'].get('content', '')
-                    elif 'text' in choice:
-                        delta_text = choice['text']
-                
-                # 텍스트가 있으면 전송
-                if delta_text:
-                    accumulated_text += delta_text
-                    yield f"data: {json.dumps({'type': 'delta', 'text': delta_text})}\n\n"
-                
-                # 완료 이벤트 확인
-                if event_type in ['response.completed', 'message.completed', 'done']:
-                    logger.info("스트리밍 완료 이벤트 수신")
-                    break
-            
-            # 응답 히스토리 추가
-            SessionManager.add_to_history(current_session_id, 'assistant', accumulated_text)
-            
-            # 완료 신호
-            yield f"data: {json.dumps({'type': 'done', 'full_text': accumulated_text})}\n\n"
-            yield "data: [DONE]\n\n"
-            
-        except Exception as e:
-            logger.error(f"스트리밍 처리 오류: {str(e)}")
-            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+    if not question:
+        return app.response_class(
+            f"data: {json.dumps({'error': '질문을 입력해주세요'})}\n\n",
+            mimetype='text/event-stream',
+            headers=SSE_HEADERS
+        )
+    
+    # 세션 관리
+    session_id, session_data = SessionManager.get_or_create_session(session_id)
+    
+    def prepare_turn():
+        # 사용자 질문 히스토리 추가 (새 생성을 시작할 때만)
+        SessionManager.add_to_history(session_id, 'user', question)
+        return (
+            session_data.history[:-1],  # 현재 질문 제외
+            session_data.uploaded_file_dicts()
+        )
+    
+    # 업스트림은 백그라운드에서 수신하고, 이 응답은 구독자로 붙는다
+    # (같은 세션에서 같은 질문이 생성 중이면 기존 스트림을 공유)
+    stream, created = agent_streams.get_or_create(session_id, question, prepare_turn)
+    if not created:
+        logger.info("진행 중인 스트림에 구독자 추가: %s (turn %d)", stream.stream_id, stream.turn)
     
     return app.response_class(
-        generate(),
+        stream.subscribe(),
         mimetype='text/event-stream',
-        headers={
-            'Cache-Control': 'no-cache',
-            'X-Accel-Buffering': 'no',  # Nginx 버퍼링 비활성화
-            'Connection': 'keep-alive'
-        }
+        headers=SSE_HEADERS
+    )
+
+
+@app.route('/api/chat/stream/<stream_id>', methods=['GET'])
+def resume_chat_stream(stream_id):
+    """끊어진 스트림 재연결 (Last-Event-ID 이후 프레임부터 재생)"""
+    stream = agent_streams.get(stream_id)
+    if stream is None:
+        return jsonify({'error': '스트림을 찾을 수 없습니다'}), 404
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id', '0')
+    try:
+        last_event_id = int(last_event_id)
+    except ValueError:
+        return jsonify({'error': '유효하지 않은 Last-Event-ID입니다'}), 400
+    
+    logger.info("스트림 재연결: %s (Last-Event-ID=%d)", stream_id, last_event_id)
+    return app.response_class(
+        stream.subscribe(last_event_id),
+        mimetype='text/event-stream',
+        headers=SSE_HEADERS
     )
 
 
+@app.route('/api/session/<session_id>/stream', methods=['GET'])
+def attach_session_stream(session_id):
+    """세션에서 생성 중인 응답에 구독자로 붙기 (다른 탭/새로고침 후, 이미 생성된 부분부터 수신)"""
+    stream = agent_streams.latest_inflight(session_id)
+    if stream is None:
+        return jsonify({'error': '진행 중인 응답이 없습니다'}), 404
+    
+    logger.info("세션 스트림 구독: %s (turn %d)", stream.stream_id, stream.turn)
+    return app.response_class(
+        stream.subscribe(),
+        mimetype='text/event-stream',
+        headers=SSE_HEADERS
+    )
+
+
+@app.errorhandler(413)
+def request_too_large(e):
+    """요청 본문이 MAX_CONTENT_LENGTH를 넘은 경우 (Werkzeug 기본 HTML 대신 JSON)"""
+    return jsonify({
+        'error': f'요청 크기가 너무 큽니다. 파일당 최대 {Config.MAX_UPLOAD_MB}MB, '
+                 f'한 번에 최대 {Config.UPLOAD_MAX_TOTAL_MB}MB까지 업로드할 수 있습니다'
+    }), 413
+
+
 @app.route('/api/upload', methods=['POST'])
 def upload():
     """파일 업로드 처리"""
@@ -709,7 +2176,7 @@ def upload():
         file_info = uploader.upload_file(file, session_id)
         
         # 세션에 파일 정보 추가
-        session_data['uploaded_files'].append(file_info)
+        SessionManager.add_uploaded_file(session_id, file_info)
         
         return jsonify({
             'success': True,
@@ -719,22 +2186,158 @@ def upload():
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        logger.error(f"파일 업로드 오류: {str(e)}")
+        logger.error("파일 업로드 오류: %s", e)
         return jsonify({'error': '파일 업로드 중 오류가 발생했습니다'}), 500
 
 
+# 전체 요청에서 공유하는 Volume 업로드 풀 (Files API 동시 PUT 수 제한)
+upload_executor = ThreadPoolExecutor(max_workers=Config.UPLOAD_CONCURRENCY, thread_name_prefix='volume-upload')
+
+
+def _validate_upload_batch(files):
+    """다중 업로드 검증 (모두 통과해야 업로드 시작) - 반환값: [(file, 저장 파일명, 크기 MB)]"""
+    files = [file for file in files if file and file.filename]
+    if not files:
+        raise ValueError('파일이 없습니다')
+    if len(files) > Config.UPLOAD_MAX_FILES:
+        raise ValueError(f'한 번에 최대 {Config.UPLOAD_MAX_FILES}개까지 업로드할 수 있습니다')
+    
+    validated = []
+    seen = set()
+    for index, file in enumerate(files):
+        try:
+            filename, size_mb = uploader.validate_file(file)
+        except ValueError as e:
+            raise ValueError(f'files[{index}] {file.filename}: {e}')
+        if filename in seen:
+            raise ValueError(f'files[{index}] {file.filename}: 같은 이름의 파일이 중복되었습니다')
+        seen.add(filename)
+        validated.append((file, filename, size_mb))
+    
+    total_mb = sum(size_mb for _, _, size_mb in validated)
+    if total_mb > Config.UPLOAD_MAX_TOTAL_MB:
+        raise ValueError(f'전체 파일 크기가 너무 큽니다 ({total_mb:.1f}MB). 최대: {Config.UPLOAD_MAX_TOTAL_MB}MB')
+    return validated
+
+
+@app.route('/api/upload/batch', methods=['POST'])
+def upload_batch():
+    """
+    다중 파일 업로드 (multipart, files 필드 반복)
+    
+    모든 파일을 먼저 검증하고(하나라도 실패하면 400, 아무것도 업로드하지 않음), 로컬에 저장한 뒤
+    Volume 업로드는 공용 풀에서 동시에 진행한다. 파일별 결과를 요청 순서대로 반환하며,
+    성공한 파일은 일부가 실패해도 세션에 등록된다.
+    """
+    session_id = request.form.get('session_id')
+    if not session_id:
+        return jsonify({'error': '세션 ID가 필요합니다'}), 400
+    try:
+        validated = _validate_upload_batch(request.files.getlist('files') + request.files.getlist('file'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    session_id, session_data = SessionManager.get_or_create_session(session_id)
+    started = time.perf_counter()
+    
+    # 요청 스트림은 요청 스레드에서만 읽고, 느린 Files API 업로드만 풀에 맡긴다
+    # (요청 ID/라우트가 유지되도록 요청 컨텍스트를 파일별로 복사해 실행)
+    context = contextvars.copy_context()
+    results = [None] * len(validated)
+    futures = {}
+    for index, (file, filename, size_mb) in enumerate(validated):
+        try:
+            local_file_path, size_bytes, content_hash = uploader.save_local(file, session_id, filename)
+        except Exception as e:
+            logger.error("로컬 저장 실패 (%s): %s", filename, e)
+            results[index] = {'filename': filename, 'status': 'error', 'error': str(e)}
+            continue
+        future = upload_executor.submit(
+            bind_request_context(uploader.publish, context), local_file_path, session_id, filename, size_mb, size_bytes, content_hash
+        )
+        futures[future] = index
+    
+    for future in as_completed(futures):
+        index = futures[future]
+        try:
+            file_info = future.result()
+        except Exception as e:
+            logger.error("파일 업로드 오류 (%s): %s", validated[index][1], e)
+            results[index] = {'filename': validated[index][1], 'status': 'error', 'error': str(e)}
+            continue
+        SessionManager.add_uploaded_file(session_id, file_info)
+        results[index] = {'status': 'ok', 'file': file_info}
+    
+    succeeded = sum(result['status'] == 'ok' for result in results)
+    logger.info(
+        "다중 업로드 완료: %d/%d 성공 (%.0fms)",
+        succeeded, len(results), (time.perf_counter() - started) * 1000
+    )
+    return jsonify({
+        'success': succeeded == len(results),
+        'session_id': session_id,
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'results': results
+    }), 200 if succeeded else 500
+
+
+@app.route('/api/files', methods=['GET'])
+def list_files():
+    """
+    세션에 업로드된 파일 목록 (메모리 인덱스에서 응답)
+    - session_id: 필수. 업로드 경로에 세션 ID가 들어 있으므로 다른 세션의 파일은 노출하지 않는다
+    - limit/offset: 페이지 (최신 수정 순)
+    인덱스 버전이 ETag로 노출되며 If-None-Match가 일치하면 304를 반환한다.
+    """
+    session_id = request.args.get('session_id', '')
+    if not session_id or '/' in session_id or session_id in ('.', '..'):
+        return jsonify({'error': '세션 ID가 필요합니다'}), 400
+    
+    try:
+        entries, version, refreshed_at = volume_index.snapshot()
+        etag = f"files-{volume_index.instance_id}-{version}"
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+        
+        prefix = f"{volume_index.root}/{session_id}/"
+        entries = [entry for entry in entries if entry['path'].startswith(prefix)]
+        entries.sort(key=lambda entry: entry['modified'] or 0, reverse=True)
+        
+        limit = max(1, min(request.args.get('limit', 200, type=int), 1000))
+        offset = max(0, request.args.get('offset', 0, type=int))
+        page = entries[offset:offset + limit]
+        
+        response = jsonify({
+            'files': [
+                {
+                    'path': entry['path'],
+                    'filename': os.path.basename(entry['path']),
+                    'size': entry['size'],
+                    'modified': datetime.fromtimestamp(entry['modified']).isoformat() if entry['modified'] else None,
+                    'content_hash': entry['content_hash']
+                }
+                for entry in page
+            ],
+            'total': len(entries),
+            'indexed_at': datetime.fromtimestamp(refreshed_at).isoformat() if refreshed_at else None
+        })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+        
+    except Exception as e:
+        logger.error("파일 목록 조회 오류: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/session/new', methods=['POST'])
 def new_session():
     """새 세션 시작"""
     try:
-        session_id = str(uuid.uuid4())
-        chat_sessions[session_id] = {
-            'id': session_id,
-            'created_at': datetime.now(),
-            'last_access': datetime.now(),
-            'history': [],
-            'uploaded_files': []
-        }
+        session_id, _ = SessionManager.create_session()
         
         return jsonify({
             'session_id': session_id,
@@ -742,28 +2345,90 @@ def new_session():
         })
         
     except Exception as e:
-        logger.error(f"세션 생성 오류: {str(e)}")
+        logger.error("세션 생성 오류: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/session/<session_id>/history', methods=['GET'])
 def get_history(session_id):
-    """세션 히스토리 조회"""
+    """
+    세션 히스토리 조회
+    
+    쿼리 파라미터가 없으면 전체 히스토리와 업로드 파일 목록을 반환한다 (기존 형식).
+    - since=<seq>: seq 이후의 새 메시지만 반환
+    - limit=<n>: 최대 n개 반환 (since가 없으면 최신 메시지부터)
+    - cursor=<seq>: 이전 페이지의 next_cursor (since가 없을 때 seq 이전 메시지)
+    - include_files=true: 페이지 응답에도 업로드 파일 목록 포함
+    세션 버전이 ETag로 노출되며 If-None-Match가 일치하면 304를 반환한다.
+    """
     try:
         if session_id not in chat_sessions:
             return jsonify({'error': '세션을 찾을 수 없습니다'}), 404
         
-        return jsonify({
-            'session_id': session_id,
-            'history': chat_sessions[session_id]['history'],
-            'uploaded_files': chat_sessions[session_id]['uploaded_files']
-        })
+        session_data = chat_sessions[session_id]
+        etag = SessionManager.etag(session_id)
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+        else:
+            response = _history_response(session_id, session_data)
+        
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        logger.error(f"히스토리 조회 오류: {str(e)}")
+        logger.error("히스토리 조회 오류: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
+def _history_response(session_id, session_data):
+    """히스토리 응답 생성 (전체 또는 페이지)"""
+    args = request.args
+    if not any(key in args for key in ('since', 'limit', 'cursor')):
+        return jsonify({
+            'session_id': session_id,
+            'history': [message.to_dict() for message in session_data.history],
+            'uploaded_files': session_data.uploaded_file_dicts()
+        })
+    
+    since = args.get('since', type=int)
+    cursor = args.get('cursor', type=int)
+    limit = args.get('limit', type=int)
+    for key, value in (('since', since), ('cursor', cursor), ('limit', limit)):
+        if key in args and value is None:
+            raise ValueError(f'{key}는 정수여야 합니다')
+    limit = max(1, min(limit or Config.HISTORY_PAGE_MAX, Config.HISTORY_PAGE_MAX))
+    
+    history = session_data.history
+    if since is not None:
+        # since 이후 새 메시지 (오래된 것부터), cursor가 있으면 그 이후부터 이어서
+        start = max(since, cursor or 0)
+        messages = [m for m in history if m.seq > start]
+        page = messages[:limit]
+        has_more = len(messages) > limit
+        next_cursor = page[-1].seq if has_more else None
+    else:
+        # 최신 메시지부터 역방향 페이지
+        messages = [m for m in history if cursor is None or m.seq < cursor]
+        page = messages[-limit:]
+        has_more = len(messages) > limit
+        next_cursor = page[0].seq if has_more else None
+    
+    body = {
+        'session_id': session_id,
+        'history': [message.to_dict() for message in page],
+        'version': session_data.version,
+        'last_seq': session_data.message_seq,
+        'has_more': has_more,
+        'next_cursor': next_cursor
+    }
+    if args.get('include_files', 'false').lower() == 'true':
+        body['uploaded_files'] = session_data.uploaded_file_dicts()
+    return jsonify(body)
+
+
 @app.route('/health', methods=['GET'])
 def health():
     """헬스체크"""
@@ -795,7 +2460,8 @@ def debug_auth():
                 'env_DATABRICKS_TOKEN': token_env,
                 'env_DATABRICKS_APP_TOKEN': token_alt,
             },
-            'token_preview': token_preview
+            'token_preview': token_preview,
+            'credentials': credentials.status()
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -877,10 +2543,125 @@ def debug_volume():
         return jsonify(info)
         
     except Exception as e:
-        logger.error(f"Volume 디버그 오류: {str(e)}")
+        logger.error("Volume 디버그 오류: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
+class SamplingProfiler:
+    """
+    모든 스레드의 스택을 주기적으로 샘플링하는 저부하 프로파일러.
+    결과는 flame graph 도구(flamegraph.pl, speedscope 등)에서 읽는 collapsed-stack 형식이다.
+    """
+    
+    def __init__(self, interval, by_route=False):
+        self.interval = interval
+        self.by_route = by_route
+        self.samples = 0
+        self.stacks = {}
+    
+    @staticmethod
+    def _frame_label(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    
+    def _root_label(self, thread_id, threads):
+        route = active_routes.get(thread_id) if self.by_route else None
+        if route:
+            return f"route:{route}"
+        thread = threads.get(thread_id)
+        name = thread.name if thread else f"thread-{thread_id}"
+        # 스레드 번호/ID는 묶어서 집계 (Thread-12, agent-stream-1a2b3c4d 등)
+        return re.sub(r'[0-9a-f]{8}$|\d+', '*', name)
+    
+    def run(self, seconds):
+        own_thread = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            threads = {thread.ident: thread for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(self._frame_label(frame))
+                    frame = frame.f_back
+                labels.append(self._root_label(thread_id, threads))
+                key = ';'.join(reversed(labels))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+            time.sleep(self.interval)
+        return self
+    
+    def collapsed(self):
+        lines = sorted(self.stacks.items(), key=lambda item: item[1], reverse=True)
+        return ''.join(f"{stack} {count}\n" for stack, count in lines)
+
+
+# 동시에 하나의 프로파일만 실행
+profile_lock = threading.Lock()
+
+
+@app.before_request
+def track_active_route():
+    """프로파일러의 라우트별 집계를 위해 현재 스레드의 라우트 기록"""
+    if request.url_rule is not None:
+        request_route_var.set(request.url_rule.rule)
+        active_routes[threading.get_ident()] = request.url_rule.rule
+
+
+@app.after_request
+def untrack_active_route(response):
+    """
+    응답이 닫힐 때 라우트 기록 해제.
+    teardown_request는 스트리밍 응답 본문을 내보내기 전에 실행되므로 사용하지 않는다
+    (SSE/NDJSON 생성 중인 스레드도 해당 라우트로 집계되어야 함).
+    """
+    thread_id = threading.get_ident()
+    response.call_on_close(lambda: active_routes.pop(thread_id, None))
+    return response
+
+
+@app.route('/debug/profile', methods=['GET'])
+def debug_profile():
+    """
+    샘플링 프로파일러 (인증 필요)
+    
+    DEBUG_PROFILE_TOKEN이 설정된 경우에만 사용 가능하며,
+    Authorization: Bearer <token> 또는 X-Debug-Token 헤더로 인증한다.
+    - seconds: 샘플링 시간 (기본 10, 최대 PROFILE_MAX_SECONDS)
+    - interval_ms: 샘플링 간격 (기본 10ms)
+    - mode=routes: 요청 스레드 샘플을 스레드 이름 대신 라우트별로 집계
+    """
+    expected = Config.DEBUG_PROFILE_TOKEN
+    if not expected:
+        return jsonify({'error': '프로파일러가 비활성화되어 있습니다 (DEBUG_PROFILE_TOKEN 미설정)'}), 404
+    
+    auth = request.headers.get('Authorization', '')
+    provided = auth[7:] if auth.startswith('Bearer ') else request.headers.get('X-Debug-Token', '')
+    if not hmac.compare_digest(provided.encode(), expected.encode()):
+        return jsonify({'error': '인증이 필요합니다'}), 401
+    
+    seconds = request.args.get('seconds', 10, type=float)
+    interval_ms = request.args.get('interval_ms', 10, type=float)
+    seconds = max(0.1, min(seconds, Config.PROFILE_MAX_SECONDS))
+    interval = max(1.0, interval_ms) / 1000
+    by_route = request.args.get('mode') == 'routes'
+    
+    if not profile_lock.acquire(blocking=False):
+        return jsonify({'error': '이미 프로파일링이 진행 중입니다'}), 409
+    try:
+        logger.info("프로파일링 시작: %.1fs, 간격 %.0fms, mode=%s",
+                    seconds, interval * 1000, 'routes' if by_route else 'threads')
+        profiler = SamplingProfiler(interval, by_route=by_route).run(seconds)
+    finally:
+        profile_lock.release()
+    
+    response = app.response_class(profiler.collapsed(), mimetype='text/plain')
+    response.headers['X-Profile-Samples'] = str(profiler.samples)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
 if __name__ == '__main__':
     # 로컬 개발용
     port = int(os.environ.get('PORT', 5000))
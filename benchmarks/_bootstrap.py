@@ -0,0 +1,19 @@
+"""
+벤치마크 공통 준비
+
+app 모듈은 import 시점에 Config를 읽고 저널/Volume 디렉토리를 만들므로,
+import 전에 임시 디렉토리와 로컬 모드 환경 변수를 지정한다.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+WORKDIR = tempfile.mkdtemp(prefix='rag-demo-bench-')
+os.environ.setdefault('SESSION_JOURNAL_DIR', os.path.join(WORKDIR, 'session_journal'))
+os.environ.setdefault('VOLUME_BASE_PATH', os.path.join(WORKDIR, 'local_volumes'))
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ['DATABRICKS_TOKEN'] = ''
+os.environ['DATABRICKS_CLIENT_ID'] = ''
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,88 @@
+"""
+JSON 응답 압축 벤치마크 (바이트 수 / 압축 CPU 시간)
+
+1) 한국어 마크다운 답변(약 3KB) 1건을 JSON으로 직렬화한 뒤 gzip/brotli 레벨별 크기와 시간
+2) 10개 메시지 히스토리: ensure_ascii=True/False 크기 비교
+3) /api/session/<id>/history 응답을 Accept-Encoding별로 요청 (compress_response 훅 포함 전체 경로)
+
+사용법: python benchmarks/bench_compression.py [반복 수]
+"""
+import gzip
+import json
+import sys
+import time
+
+import _bootstrap  # noqa: F401
+
+import app as app_module
+from app import Config, SessionManager, brotli
+
+SENTENCES = [
+    '연차 휴가는 입사일 기준으로 1년간 80% 이상 출근한 직원에게 15일이 부여됩니다.',
+    '근속 연수가 3년 이상인 경우 매 2년마다 1일씩 가산되며, 최대 25일까지 부여됩니다.',
+    '**예외 사항**: 육아휴직 기간은 출근한 것으로 간주하여 연차 산정에 포함합니다.',
+    '- 반차(4시간) 사용 시 0.5일이 차감되며, 반반차 제도는 운영하지 않습니다.',
+    '미사용 연차는 회계연도 종료 후 {n}일 이내에 수당으로 정산됩니다.',
+    '> 참고: 인사규정 제{n}조 및 취업규칙 별표 {n}을 확인하세요.',
+    '1. 신청은 사내 포털의 근태 메뉴에서 최소 {n}일 전에 제출해야 합니다.',
+    '팀장 승인 후 인사팀 검토를 거쳐 확정되며, 긴급한 경우 사후 승인이 가능합니다.',
+]
+
+
+def build_answer(target_bytes=3000):
+    lines = ['## 연차 휴가 규정 요약', '']
+    n = 0
+    while len('\n'.join(lines).encode('utf-8')) < target_bytes:
+        lines.append(SENTENCES[n % len(SENTENCES)].format(n=n + 3))
+        n += 1
+    return '\n'.join(lines)
+
+
+def timed(fn, repeat):
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    answer = build_answer()
+    body = json.dumps({'response': answer, 'session_id': 'x' * 36}, ensure_ascii=False).encode('utf-8')
+    print(f"[1] 답변 1건: 원문 {len(answer.encode('utf-8'))} B, JSON {len(body)} B")
+    
+    codecs = [(f'gzip-{level}', lambda level=level: gzip.compress(body, compresslevel=level, mtime=0))
+              for level in (1, 5, 9)]
+    if brotli is not None:
+        codecs += [(f'br-{quality}', lambda quality=quality: brotli.compress(body, quality=quality))
+                   for quality in (1, 4, 11)]
+    else:
+        print('    (Brotli 미설치: br 생략)')
+    for name, fn in codecs:
+        data, seconds = timed(fn, repeat)
+        print(f"    {name:<8} {len(data):6d} B  {seconds * 1e6:8.0f} us")
+    
+    history = [{'role': 'user' if i % 2 == 0 else 'assistant', 'content': answer} for i in range(10)]
+    escaped = json.dumps({'history': history}).encode('utf-8')
+    utf8 = json.dumps({'history': history}, ensure_ascii=False).encode('utf-8')
+    print(f"[2] 히스토리 10건: ensure_ascii=True {len(escaped) / 1024:.1f} KB -> False {len(utf8) / 1024:.1f} KB")
+    
+    session_id, _ = SessionManager.create_session()
+    for message in history:
+        SessionManager.add_to_history(session_id, message['role'], message['content'])
+    client = app_module.app.test_client()
+    print(f"[3] GET /api/session/<id>/history (COMPRESS_MIN_BYTES={Config.COMPRESS_MIN_BYTES}, "
+          f"gzip {Config.COMPRESS_GZIP_LEVEL}, br {Config.COMPRESS_BROTLI_QUALITY})")
+    for accept in ('identity', 'gzip', 'br, gzip', 'br'):
+        response, seconds = timed(
+            lambda: client.get(f'/api/session/{session_id}/history', headers={'Accept-Encoding': accept}),
+            repeat
+        )
+        encoding = response.headers.get('Content-Encoding', 'identity')
+        print(f"    Accept-Encoding: {accept:<9} -> {encoding:<8} {len(response.data):6d} B  "
+              f"{seconds * 1e6:8.0f} us/request")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+세션 저널 기록/재생 벤치마크
+
+세션 N개(기본 100,000)를 만들고 세션마다 메시지 2건, 10번째 세션마다 파일 1건을 기록한 뒤
+1) 저널만으로 재생하는 시간, 2) 압축(스냅샷) 후 스냅샷으로 재생하는 시간을 측정하여
+SESSION_JOURNAL_REPLAY_BUDGET_SEC와 비교한다. 예산을 넘으면 종료 코드 1.
+
+사용법: python benchmarks/bench_journal_replay.py [세션 수]
+"""
+import os
+import sys
+import time
+
+import _bootstrap  # noqa: F401
+
+import app as app_module
+from app import Config, SessionJournal, SessionManager, chat_sessions
+
+
+def wait_for_compaction(journal):
+    while True:
+        with journal.lock:
+            if not journal._compacting:
+                return
+        time.sleep(0.05)
+
+
+def replay(journal):
+    sessions = {}
+    started = time.perf_counter()
+    journal.recover(sessions)
+    return sessions, time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    directory = os.path.join(_bootstrap.WORKDIR, 'bench_journal')
+    journal = SessionJournal(directory)
+    app_module.session_journal = journal
+    Config.SESSION_JOURNAL_COMPACT_EVENTS = sys.maxsize  # 기록 중에는 압축하지 않음
+    chat_sessions.clear()
+    
+    answer = '연차 휴가는 1년간 80% 이상 출근한 직원에게 15일이 부여됩니다. ' * 4
+    started = time.perf_counter()
+    for i in range(count):
+        session_id, _ = SessionManager.create_session()
+        SessionManager.add_to_history(session_id, 'user', f'질문 {i}: 연차 휴가는 며칠인가요?')
+        SessionManager.add_to_history(session_id, 'assistant', answer)
+        if i % 10 == 0:
+            SessionManager.add_uploaded_file(
+                session_id, {'filename': f'규정_{i}.pdf', 'path': f'/Volumes/c/s/v/uploads/{session_id}/규정_{i}.pdf', 'size_mb': 1.2}
+            )
+    elapsed = time.perf_counter() - started
+    events = count * 3 + (count + 9) // 10
+    size_mb = os.path.getsize(os.path.join(directory, SessionJournal.JOURNAL_FILE)) / (1024 * 1024)
+    print(f"기록: 세션 {count}개, 이벤트 {events}건, 저널 {size_mb:.1f} MB, {elapsed / events * 1e6:.1f} us/event")
+    
+    # 1) 저널만으로 재생 (recover가 끝나면 백그라운드 압축 시작 → 스냅샷 생성)
+    sessions, journal_seconds = replay(journal)
+    assert len(sessions) == count
+    print(f"재생 (저널): {journal_seconds:.2f}s")
+    wait_for_compaction(journal)
+    
+    # 2) 스냅샷으로 재생
+    sessions, snapshot_seconds = replay(journal)
+    assert len(sessions) == count
+    print(f"재생 (스냅샷): {snapshot_seconds:.2f}s")
+    
+    budget = Config.SESSION_JOURNAL_REPLAY_BUDGET_SEC
+    worst = max(journal_seconds, snapshot_seconds)
+    print(f"예산 {budget:.1f}s: {'통과' if worst <= budget else '초과'}")
+    sys.exit(0 if worst <= budget else 1)
+
+
+if __name__ == '__main__':
+    main()
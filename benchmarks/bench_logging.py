@@ -0,0 +1,89 @@
+"""
+요청당 로깅 오버헤드 벤치마크 (요청 스레드에서 측정)
+
+before: logging.basicConfig + f-string 로그 (레코드 생성 시 포맷, 요청 스레드에서 I/O)
+after : app.configure_logging()과 같은 구성 - DeferredQueueHandler + 필터 + QueueListener(JSON)
+
+/api/chat 한 번에 해당하는 로그 4건(info 3 + debug 1)을 요청 1건으로 보고, 출력은 /dev/null로 보낸다.
+after는 리스너 스레드의 포맷팅이 GIL을 나눠 쓰는 비용까지 포함하고, enqueue는 리스너를 멈춘 채
+요청 스레드의 큐 삽입 비용만 측정한다 (CPU가 1개인 환경에서는 after와 enqueue 차이가 크다).
+
+사용법: python benchmarks/bench_logging.py [요청 수]
+"""
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+import _bootstrap  # noqa: F401
+
+from app import DeferredQueueHandler, JsonFormatter, RequestContextFilter, SamplingFilter, request_id_var
+
+QUESTION = '연차 휴가는 입사 첫 해에 며칠까지 사용할 수 있나요? 관련 규정과 예외 사항을 알려주세요.'
+RESULT = {'output': [{'content': [{'type': 'output_text', 'text': '답변'}]}], 'id': 'resp_1', 'usage': {}}
+
+
+def before(logger):
+    logger.info(f"Agent 호출: {QUESTION[:50]}...")
+    logger.info("Agent 응답 수신 완료")
+    logger.info(f"응답 파싱 시작, 응답 키: {list(RESULT.keys())}")
+    logger.info(f"답변 추출 완료: {len(QUESTION)} chars")
+
+
+def after(logger):
+    logger.info("Agent 호출: %.50s...", QUESTION)
+    logger.info("Agent 응답 수신 완료")
+    logger.debug("응답 파싱: %s", list(RESULT.keys()))
+    logger.info("답변 추출 완료: %d chars", len(QUESTION))
+
+
+def measure(name, logger, fn, iterations):
+    for _ in range(1000):
+        fn(logger)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn(logger)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<8} {elapsed / iterations * 1e6:7.1f} us/request")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    devnull = open(os.devnull, 'w')
+    
+    legacy_handler = logging.StreamHandler(devnull)
+    legacy_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    legacy = logging.getLogger('bench.before')
+    legacy.propagate = False
+    legacy.handlers = [legacy_handler]
+    legacy.setLevel(logging.INFO)
+    
+    stream_handler = logging.StreamHandler(devnull)
+    stream_handler.setFormatter(JsonFormatter())
+    log_queue = queue.Queue(maxsize=100000)
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(SamplingFilter(1))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    current = logging.getLogger('bench.after')
+    current.propagate = False
+    current.handlers = [queue_handler]
+    current.setLevel(logging.INFO)
+    request_id_var.set('bench-request')
+    
+    print(f"{iterations} requests x 4 log calls")
+    measure('before', legacy, before, iterations)
+    measure('after', current, after, iterations)
+    listener.stop()
+    
+    log_queue.queue.clear()
+    queue_handler.queue = queue.Queue(maxsize=iterations * 4 + 4000)
+    measure('enqueue', current, after, iterations)
+    print(f"dropped (queue full): {queue_handler.dropped}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+세션 메모리 벤치마크 (tracemalloc, 세션당 바이트)
+
+before: dict 세션 + datetime 시각 + ISO 문자열 타임스탬프를 가진 dict 메시지/파일 (이전 표현)
+after : __slots__ Session/Message/FileRef, epoch float 시각, intern된 역할 문자열
+
+메시지 본문은 두 표현이 같은 문자열 객체를 공유하므로 표현 자체의 오버헤드만 측정한다.
+
+사용법: python benchmarks/bench_session_memory.py [세션 수]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+import _bootstrap  # noqa: F401
+
+from app import FileRef, Message, Session
+
+MESSAGES_PER_SESSION = 10
+TEXTS = ['연차 휴가는 며칠인가요?', '연차 휴가는 1년간 80% 이상 출근한 직원에게 15일이 부여됩니다.']
+
+
+def build_before(session_ids):
+    sessions = {}
+    for session_id in session_ids:
+        now = datetime.now()
+        session = {
+            'id': session_id,
+            'created_at': now,
+            'last_access': now,
+            'history': [],
+            'uploaded_files': [],
+            'version': 0,
+            'message_seq': 0
+        }
+        for seq in range(1, MESSAGES_PER_SESSION + 1):
+            session['history'].append({
+                'seq': seq,
+                'role': 'user' if seq % 2 else 'assistant',
+                'content': TEXTS[seq % 2],
+                'timestamp': datetime.now().isoformat()
+            })
+        session['uploaded_files'].append({
+            'filename': '규정.pdf',
+            'path': f'/Volumes/c/s/v/uploads/{session_id}/규정.pdf',
+            'size_mb': 1.2
+        })
+        session['version'] = session['message_seq'] = MESSAGES_PER_SESSION
+        sessions[session_id] = session
+    return sessions
+
+
+def build_after(session_ids):
+    sessions = {}
+    for session_id in session_ids:
+        session = Session(session_id, time.time())
+        for seq in range(1, MESSAGES_PER_SESSION + 1):
+            session.history.append(Message(seq, 'user' if seq % 2 else 'assistant', TEXTS[seq % 2], time.time()))
+        session.uploaded_files.append(FileRef('규정.pdf', f'/Volumes/c/s/v/uploads/{session_id}/규정.pdf', 1.2))
+        session.version = session.message_seq = MESSAGES_PER_SESSION
+        sessions[session_id] = session
+    return sessions
+
+
+def measure(build, session_ids):
+    gc.collect()
+    tracemalloc.start()
+    sessions = build(session_ids)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sessions
+    return current / len(session_ids)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    session_ids = [str(uuid.uuid4()) for _ in range(count)]
+    before = measure(build_before, session_ids)
+    after = measure(build_after, session_ids)
+    print(f"세션 {count}개 (메시지 {MESSAGES_PER_SESSION}건, 파일 1건)")
+    print(f"before {before:7.0f} bytes/session")
+    print(f"after  {after:7.0f} bytes/session ({(after - before) / before * 100:+.0f}%)")
+
+
+if __name__ == '__main__':
+    main()
@@ -19,6 +19,13 @@ class Config:
     
     DATABRICKS_TOKEN = os.environ.get('DATABRICKS_TOKEN', '')
     
+    # Service Principal OAuth (M2M) 설정 - 설정 시 PAT 대신 사용
+    DATABRICKS_HOST = os.environ.get('DATABRICKS_HOST', '')
+    DATABRICKS_CLIENT_ID = os.environ.get('DATABRICKS_CLIENT_ID', '')
+    DATABRICKS_CLIENT_SECRET = os.environ.get('DATABRICKS_CLIENT_SECRET', '')
+    DATABRICKS_OAUTH_TOKEN_URL = os.environ.get('DATABRICKS_OAUTH_TOKEN_URL', '')  # 기본: {host}/oidc/v1/token
+    OAUTH_REFRESH_MARGIN_SEC = int(os.environ.get('OAUTH_REFRESH_MARGIN_SEC', 300))
+    
     # Vector Search 설정
     VECTOR_SEARCH_INDEX = os.environ.get(
         'VECTOR_SEARCH_INDEX',
@@ -36,27 +43,78 @@ class Config:
     VOLUME_BASE_PATH = os.environ.get(
         'VOLUME_BASE_PATH',
         f'/Volumes/{CATALOG_NAME}/{SCHEMA_NAME}/{VOLUME_NAME}' 
-        if os.environ.get('DATABRICKS_TOKEN') 
+        if os.environ.get('DATABRICKS_TOKEN') or os.environ.get('DATABRICKS_CLIENT_ID')
         else './local_volumes'
     )
     
     # 세션 설정
     SESSION_TIMEOUT_MINUTES = int(os.environ.get('SESSION_TIMEOUT_MINUTES', 60))
     MAX_HISTORY_TURNS = int(os.environ.get('MAX_HISTORY_TURNS', 5))
+    HISTORY_PAGE_MAX = int(os.environ.get('HISTORY_PAGE_MAX', 100))  # 히스토리 API 페이지 최대 크기
+    
+    # 세션 저널 설정 (재시작 후 세션 복구, 빈 값이면 비활성화)
+    # 로컬 디스크 기본값은 같은 컨테이너 안의 프로세스 재시작만 견딘다. 재배포 후에도 유지하려면
+    # 재배포 시 교체되지 않는 저장소(POSIX 파일 쓰기가 가능한 영구 마운트)를 지정해야 한다.
+    SESSION_JOURNAL_DIR = os.environ.get('SESSION_JOURNAL_DIR', './session_journal')
+    SESSION_JOURNAL_COMPACT_EVENTS = int(os.environ.get('SESSION_JOURNAL_COMPACT_EVENTS', 50000))  # 스냅샷 주기 (이벤트 수)
+    SESSION_JOURNAL_REPLAY_BUDGET_SEC = float(os.environ.get('SESSION_JOURNAL_REPLAY_BUDGET_SEC', 5))
+    
+    # 업스트림 재시도 설정 (Agent, Files API 공용)
+    RETRY_MAX_ATTEMPTS = int(os.environ.get('RETRY_MAX_ATTEMPTS', 3))  # 최초 시도 포함
+    RETRY_BASE_DELAY_SEC = float(os.environ.get('RETRY_BASE_DELAY_SEC', 0.5))
+    RETRY_MAX_DELAY_SEC = float(os.environ.get('RETRY_MAX_DELAY_SEC', 8))
+    RETRY_BUDGET_RATIO = float(os.environ.get('RETRY_BUDGET_RATIO', 0.1))  # 재시도 ≤ 요청의 10%
+    RETRY_BUDGET_MIN_PER_SEC = float(os.environ.get('RETRY_BUDGET_MIN_PER_SEC', 0.5))
+    RETRY_BUDGET_MAX_TOKENS = float(os.environ.get('RETRY_BUDGET_MAX_TOKENS', 10))
+    
+    # 스트리밍 설정
+    STREAM_HEARTBEAT_SEC = float(os.environ.get('STREAM_HEARTBEAT_SEC', 15))
+    STREAM_REPLAY_BUFFER = int(os.environ.get('STREAM_REPLAY_BUFFER', 2000))  # 스트림당 보관 프레임 수
+    STREAM_RESUME_GRACE_SEC = float(os.environ.get('STREAM_RESUME_GRACE_SEC', 10))  # 구독자 없음 → 업스트림 취소까지 대기
+    STREAM_RETENTION_SEC = int(os.environ.get('STREAM_RETENTION_SEC', 120))  # 완료 후 재연결 허용 시간
+    
+    # 배치 질의 설정 (/api/chat/batch)
+    BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 500))
+    BATCH_MAX_CONCURRENCY = int(os.environ.get('BATCH_MAX_CONCURRENCY', 8))  # 요청당 동시 실행 수
+    BATCH_UPSTREAM_CONCURRENCY = int(os.environ.get('BATCH_UPSTREAM_CONCURRENCY', 16))  # 전체 배치 동시 Agent 호출 수
     
     # 파일 업로드 설정
     ALLOWED_FILE_TYPES = set(
         os.environ.get('ALLOWED_FILE_TYPES', 'pdf,docx,pptx,txt,xlsx').split(',')
     )
     MAX_UPLOAD_MB = int(os.environ.get('MAX_UPLOAD_MB', 10))
+    UPLOAD_MAX_FILES = int(os.environ.get('UPLOAD_MAX_FILES', 20))  # /api/upload/batch 요청당 파일 수
+    UPLOAD_MAX_TOTAL_MB = int(os.environ.get('UPLOAD_MAX_TOTAL_MB', 50))  # /api/upload/batch 요청당 합계 크기
+    UPLOAD_CONCURRENCY = int(os.environ.get('UPLOAD_CONCURRENCY', 4))  # 전체 동시 Volume 업로드 수
+    
+    # 응답 압축 설정 (JSON 응답, 지연 시간을 고려한 중간 압축 레벨)
+    COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 5))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 1))  # gzip 미지원 클라이언트용 (가장 빠른 품질)
+    
+    # Volume 파일 인덱스 설정 (/api/files)
+    VOLUME_INDEX_TTL_SEC = int(os.environ.get('VOLUME_INDEX_TTL_SEC', 300))
+    VOLUME_LIST_PAGE_SIZE = int(os.environ.get('VOLUME_LIST_PAGE_SIZE', 1000))
     
     # Flask 설정
     SECRET_KEY = os.environ.get('SECRET_KEY', None)
-    MAX_CONTENT_LENGTH = MAX_UPLOAD_MB * 1024 * 1024  # bytes
+    # 요청 본문 상한: 다중 업로드 합계 + multipart 경계/헤더 여유분 1MB
+    MAX_CONTENT_LENGTH = (max(MAX_UPLOAD_MB, UPLOAD_MAX_TOTAL_MB) + 1) * 1024 * 1024  # bytes
+    
+    # 프로파일러 (/debug/profile) 인증 토큰, 비어 있으면 엔드포인트 비활성화
+    DEBUG_PROFILE_TOKEN = os.environ.get('DEBUG_PROFILE_TOKEN', '')
+    PROFILE_MAX_SECONDS = float(os.environ.get('PROFILE_MAX_SECONDS', 60))
     
     # 로깅 레벨
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
     
+    # 로깅 포맷 (json 또는 text)
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()
+    
+    # 반복 로그 샘플링 (N건당 1건 출력) 및 비동기 로그 큐 크기
+    LOG_SAMPLE_EVERY = int(os.environ.get('LOG_SAMPLE_EVERY', 100))
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+    
     @classmethod
     def validate(cls):
         """필수 설정 검증"""
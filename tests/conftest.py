@@ -0,0 +1,33 @@
+"""
+테스트 공통 설정
+
+app 모듈은 import 시점에 Config를 읽고 저널/Volume 디렉토리를 만들므로,
+import 전에 임시 디렉토리와 로컬 모드 환경 변수를 지정한다.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+_workdir = tempfile.mkdtemp(prefix='rag-demo-tests-')
+os.environ['SESSION_JOURNAL_DIR'] = os.path.join(_workdir, 'session_journal')
+os.environ['VOLUME_BASE_PATH'] = os.path.join(_workdir, 'local_volumes')
+os.environ['DATABRICKS_TOKEN'] = ''
+os.environ['DATABRICKS_CLIENT_ID'] = ''
+os.environ['DATABRICKS_CLIENT_SECRET'] = ''
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app as app_module  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def session_id(client):
+    return client.post('/api/session/new').get_json()['session_id']
@@ -0,0 +1,24 @@
+"""/api/chat/batch 요청 검증 테스트"""
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture(autouse=True)
+def no_agent_calls(monkeypatch):
+    def fail_query(*args, **kwargs):
+        raise AssertionError('검증 실패 요청에서 Agent가 호출되면 안 됩니다')
+    monkeypatch.setattr(app_module.agent_client, 'query', fail_query)
+
+
+@pytest.mark.parametrize('item', [
+    {'question': 'b', 'history': ['x']},
+    {'question': 'b', 'history': [{'role': 'user'}]},
+    {'question': 'b', 'history': [{'role': 'user', 'content': 3}]},
+    {'question': 'b', 'uploaded_files': 'a.pdf'},
+    {'question': 'b', 'uploaded_files': ['a.pdf']},
+])
+def test_malformed_item_is_rejected_before_any_work(client, item):
+    response = client.post('/api/chat/batch', json={'items': [{'question': 'ok'}, item]})
+    assert response.status_code == 400
+    assert 'items[1]' in response.get_json()['error']
@@ -0,0 +1,177 @@
+"""/api/chat/stream 재연결/취소 테스트 (Agent 업스트림은 FakeAgent로 대체)"""
+import json
+import queue
+import time
+
+import pytest
+
+import app as app_module
+from config import Config
+
+
+class FakeAgent:
+    """
+    query_stream 대역.
+    테스트가 push()한 이벤트를 순서대로 내보내고, cancel_token이 취소되면 종료한다.
+    """
+    
+    def __init__(self):
+        self.calls = 0
+        self._events = queue.Queue()
+    
+    def push(self, *texts, done=False):
+        for text in texts:
+            self._events.put({'type': 'response.output_text.delta', 'delta': text})
+        if done:
+            self._events.put({'type': 'done'})
+    
+    def query_stream(self, question, history=None, uploaded_files=None, cancel_token=None):
+        self.calls += 1
+        while not cancel_token.cancelled:
+            try:
+                event = self._events.get(timeout=0.01)
+            except queue.Empty:
+                continue
+            yield event
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    fake = FakeAgent()
+    monkeypatch.setattr(app_module.agent_client, 'query_stream', fake.query_stream)
+    return fake
+
+
+def _frames(chunks):
+    """SSE 청크 → [(id, payload)] (id 없는 프레임은 None, [DONE]은 문자열 그대로)"""
+    frames = []
+    for block in ''.join(chunks).split('\n\n'):
+        if not block or block.startswith(':'):
+            continue
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        data = fields['data']
+        frames.append((
+            int(fields['id']) if 'id' in fields else None,
+            data if data == '[DONE]' else json.loads(data)
+        ))
+    return frames
+
+
+def _read(response, count):
+    """스트리밍 응답에서 프레임 count개를 읽음 (하트비트 제외)"""
+    chunks = []
+    while len(_frames(chunks)) < count:
+        chunk = next(response.response)
+        chunks.append(chunk.decode() if isinstance(chunk, bytes) else chunk)
+    return _frames(chunks)
+
+
+def _wait_done(stream, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not stream.done:
+        assert time.monotonic() < deadline, '업스트림 스레드가 종료되지 않았습니다'
+        time.sleep(0.01)
+
+
+def test_resume_replays_frames_after_last_event_id(client, session_id, agent):
+    agent.push('Hel', 'lo', done=True)
+    frames = _frames(client.post('/api/chat/stream', json={
+        'question': 'hi', 'session_id': session_id
+    }).get_data(as_text=True))
+    stream_id = frames[0][1]['stream_id']
+    assert [seq for seq, _ in frames] == [1, 2, 3, 4, None]
+    
+    resumed = client.get(f'/api/chat/stream/{stream_id}', headers={'Last-Event-ID': '2'})
+    assert _frames(resumed.get_data(as_text=True)) == [
+        (3, {'type': 'delta', 'text': 'lo'}),
+        (4, {'type': 'done', 'full_text': 'Hello'}),
+        (None, '[DONE]'),
+    ]
+    assert agent.calls == 1
+
+
+def test_resume_after_buffer_eviction_sends_snapshot(client, session_id, agent, monkeypatch):
+    monkeypatch.setattr(Config, 'STREAM_REPLAY_BUFFER', 2)
+    agent.push('a', 'b', 'c', 'd', done=True)
+    frames = _frames(client.post('/api/chat/stream', json={
+        'question': 'hi', 'session_id': session_id
+    }).get_data(as_text=True))
+    stream_id = frames[0][1]['stream_id']
+    
+    # 버퍼에는 seq 5(delta d), 6(done)만 남아 있고 seq 3~4는 밀려남
+    resumed = client.get(f'/api/chat/stream/{stream_id}', headers={'Last-Event-ID': '2'})
+    assert _frames(resumed.get_data(as_text=True)) == [
+        (5, {'type': 'snapshot', 'text': 'abcd'}),
+        (6, {'type': 'done', 'full_text': 'abcd'}),
+        (None, '[DONE]'),
+    ]
+
+
+def test_upstream_cancelled_after_grace_without_subscribers(client, session_id, agent, monkeypatch):
+    monkeypatch.setattr(Config, 'STREAM_RESUME_GRACE_SEC', 0.05)
+    response = client.post('/api/chat/stream', json={
+        'question': 'hi', 'session_id': session_id
+    }, buffered=False)
+    stream = app_module.agent_streams.get(_read(response, 1)[0][1]['stream_id'])
+    response.close()
+    
+    _wait_done(stream)
+    assert stream.cancel_token.cancelled
+    assert json.loads(stream.events[-1][1])['type'] == 'error'
+
+
+def test_reconnect_within_grace_keeps_upstream(client, session_id, agent, monkeypatch):
+    monkeypatch.setattr(Config, 'STREAM_RESUME_GRACE_SEC', 0.2)
+    monkeypatch.setattr(Config, 'STREAM_HEARTBEAT_SEC', 0.05)
+    response = client.post('/api/chat/stream', json={
+        'question': 'hi', 'session_id': session_id
+    }, buffered=False)
+    stream_id = _read(response, 1)[0][1]['stream_id']
+    response.close()
+    
+    resumed = client.get(f'/api/chat/stream/{stream_id}', headers={'Last-Event-ID': '1'}, buffered=False)
+    assert next(resumed.response) == b': heartbeat\n\n'  # 구독 시작 (제너레이터는 첫 next()에서 실행됨)
+    time.sleep(0.4)
+    stream = app_module.agent_streams.get(stream_id)
+    assert not stream.cancel_token.cancelled
+    
+    agent.push('ok', done=True)
+    assert _read(resumed, 3) == [
+        (2, {'type': 'delta', 'text': 'ok'}),
+        (3, {'type': 'done', 'full_text': 'ok'}),
+        (None, '[DONE]'),
+    ]
+    resumed.close()
+
+
+def test_second_post_and_session_attach_share_one_upstream(client, session_id, agent):
+    request = {'question': 'hi', 'session_id': session_id}
+    first = client.post('/api/chat/stream', json=request, buffered=False)
+    agent.push('He')
+    first_frames = _read(first, 2)
+    stream_id = first_frames[0][1]['stream_id']
+    
+    # 같은 질문의 두 번째 POST와 세션 스트림 구독은 기존 스트림에 붙어 이미 생성된 부분부터 받음
+    second = client.post('/api/chat/stream', json=request, buffered=False)
+    attached = client.get(f'/api/session/{session_id}/stream', buffered=False)
+    for response in (second, attached):
+        frames = _read(response, 2)
+        assert frames[0][1]['stream_id'] == stream_id
+        assert frames[1] == (2, {'type': 'delta', 'text': 'He'})
+    
+    agent.push('llo', done=True)
+    for response in (first, second, attached):
+        assert _read(response, 3) == [
+            (3, {'type': 'delta', 'text': 'llo'}),
+            (4, {'type': 'done', 'full_text': 'Hello'}),
+            (None, '[DONE]'),
+        ]
+        response.close()
+    
+    assert agent.calls == 1
+    history = app_module.SessionManager.get_or_create_session(session_id)[1].history
+    assert [message.role for message in history] == ['user', 'assistant']
+
+
+def test_session_attach_without_inflight_stream_is_404(client, session_id):
+    assert client.get(f'/api/session/{session_id}/stream').status_code == 404
@@ -0,0 +1,118 @@
+"""DatabricksCredentials OAuth(M2M) 테스트 - 로컬 대체 토큰 엔드포인트 사용"""
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from app import DatabricksCredentials
+
+
+class TokenEndpoint:
+    """/oidc/v1/token 대체 서버 (지연, 토큰 수명, 실패 여부 조절)"""
+    
+    def __init__(self, latency=0.2, expires_in=3600):
+        self.latency = latency
+        self.expires_in = expires_in
+        self.fail = False
+        self.requests = []
+        endpoint = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode())
+                client = base64.b64decode(self.headers['Authorization'].split()[1]).decode()
+                endpoint.requests.append((client, body['grant_type'][0], body['scope'][0]))
+                time.sleep(endpoint.latency)
+                if endpoint.fail:
+                    self.send_response(401)
+                    self.end_headers()
+                    self.wfile.write(b'invalid_client')
+                    return
+                payload = json.dumps({
+                    'access_token': f'token-{len(endpoint.requests)}',
+                    'token_type': 'Bearer',
+                    'expires_in': endpoint.expires_in
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/oidc/v1/token'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def endpoint():
+    endpoint = TokenEndpoint()
+    yield endpoint
+    endpoint.close()
+
+
+def test_concurrent_cold_callers_share_one_fetch(endpoint):
+    credentials = DatabricksCredentials('cid', 'secret', token_url=endpoint.url)
+    barrier = threading.Barrier(20)
+    tokens = []
+    
+    def call():
+        barrier.wait()
+        tokens.append(credentials.get_token())
+    
+    threads = [threading.Thread(target=call) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert tokens == ['token-1'] * 20
+    assert endpoint.requests == [('cid:secret', 'client_credentials', 'all-apis')]
+
+
+def test_token_is_refreshed_in_background_before_expiry(endpoint):
+    endpoint.latency = 0
+    endpoint.expires_in = 3
+    credentials = DatabricksCredentials('cid', 'secret', token_url=endpoint.url, refresh_margin=2)
+    assert credentials.get_token() == 'token-1'
+    
+    # 만료(3s) 2초 전 = 1s 후 타이머 갱신, 요청 스레드는 기다리지 않음
+    # (대체 서버는 응답 전에 요청을 기록하므로 제공자 상태로 갱신 완료를 판단)
+    deadline = time.monotonic() + 2.5
+    while credentials.fetch_count < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert credentials.fetch_count == 2
+    assert len(endpoint.requests) == 2
+    
+    started = time.perf_counter()
+    assert credentials.get_token() == 'token-2'
+    assert time.perf_counter() - started < 0.05
+    assert credentials.status()['expires_in_sec'] > 2
+
+
+def test_failed_fetch_is_not_retried_within_backoff(endpoint):
+    endpoint.fail = True
+    credentials = DatabricksCredentials('cid', 'wrong', token_url=endpoint.url)
+    for _ in range(3):
+        with pytest.raises(ValueError, match='401'):
+            credentials.get_token()
+    assert len(endpoint.requests) == 1
+    assert 'invalid_client' in credentials.status()['last_error']
+
+
+def test_without_client_credentials_uses_pat(monkeypatch):
+    monkeypatch.setenv('DATABRICKS_TOKEN', 'dapi-test')
+    credentials = DatabricksCredentials('', '')
+    assert credentials.get_token() == 'dapi-test'
+    assert credentials.status() == {'mode': 'pat'}
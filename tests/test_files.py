@@ -0,0 +1,64 @@
+"""/api/files 테스트 (로컬 모드)"""
+import hashlib
+import io
+import os
+
+import app as app_module
+
+
+def _upload(client, session_id, name):
+    response = client.post(
+        '/api/upload',
+        data={'session_id': session_id, 'file': (io.BytesIO(b'content'), name)},
+        content_type='multipart/form-data'
+    )
+    assert response.status_code == 200
+
+
+def test_files_require_session_id(client, session_id):
+    _upload(client, session_id, 'private.txt')
+    response = client.get('/api/files')
+    assert response.status_code == 400
+    assert session_id not in response.get_data(as_text=True)
+
+
+def test_files_are_scoped_to_session(client):
+    mine = client.post('/api/session/new').get_json()['session_id']
+    other = client.post('/api/session/new').get_json()['session_id']
+    _upload(client, mine, 'mine.txt')
+    _upload(client, other, 'other.txt')
+    
+    response = client.get(f'/api/files?session_id={mine}')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [f['filename'] for f in body['files']] == ['mine.txt']
+    assert other not in response.get_data(as_text=True)
+
+
+def test_files_etag_does_not_survive_restart(client, session_id, monkeypatch):
+    _upload(client, session_id, 'a.txt')
+    etag = client.get(f'/api/files?session_id={session_id}').headers['ETag']
+    assert client.get(f'/api/files?session_id={session_id}', headers={'If-None-Match': etag}).status_code == 304
+    
+    # 재시작: 새 인덱스는 같은 버전 번호를 다시 쓸 수 있음
+    restarted = app_module.VolumeFileIndex(app_module.uploader, ttl=3600)
+    restarted.entries = dict(app_module.volume_index.entries)
+    restarted.version = app_module.volume_index.version
+    restarted._checked_at = float('inf')
+    monkeypatch.setattr(app_module, 'volume_index', restarted)
+    assert client.get(f'/api/files?session_id={session_id}', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_local_refresh_rehashes_same_size_overwrite(client, session_id):
+    _upload(client, session_id, 'same.txt')
+    index = app_module.volume_index
+    index.refresh()
+    path = next(p for p in index.entries if p.endswith(f'{session_id}/same.txt'))
+    
+    # 같은 크기의 다른 내용으로 덮어쓰기 (수정 시각만 달라짐)
+    with open(path, 'wb') as f:
+        f.write(b'CONTENT')
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    index.refresh()
+    assert index.entries[path]['content_hash'] == hashlib.sha256(b'CONTENT').hexdigest()
@@ -0,0 +1,59 @@
+"""/api/session/<id>/history 페이지네이션/ETag 테스트"""
+import pytest
+
+from app import SessionManager
+
+
+@pytest.fixture
+def history_session(session_id):
+    for i in range(1, 8):
+        SessionManager.add_to_history(session_id, 'user' if i % 2 else 'assistant', f'message {i} ' * 100)
+    return session_id
+
+
+def _seqs(body):
+    return [message['seq'] for message in body['history']]
+
+
+def test_since_pages_forward_with_cursor(client, history_session):
+    url = f'/api/session/{history_session}/history'
+    first = client.get(f'{url}?since=2&limit=3').get_json()
+    assert _seqs(first) == [3, 4, 5]
+    assert first['has_more'] and first['next_cursor'] == 5
+    assert first['last_seq'] == 7
+    
+    second = client.get(f'{url}?since=2&limit=3&cursor={first["next_cursor"]}').get_json()
+    assert _seqs(second) == [6, 7]
+    assert not second['has_more'] and second['next_cursor'] is None
+
+
+def test_limit_pages_backward_from_latest(client, history_session):
+    url = f'/api/session/{history_session}/history'
+    first = client.get(f'{url}?limit=3').get_json()
+    assert _seqs(first) == [5, 6, 7]
+    assert first['next_cursor'] == 5
+    
+    second = client.get(f'{url}?limit=3&cursor=5').get_json()
+    assert _seqs(second) == [2, 3, 4]
+    third = client.get(f'{url}?limit=3&cursor=2').get_json()
+    assert _seqs(third) == [1]
+    assert not third['has_more']
+
+
+def test_invalid_paging_parameter_is_400(client, history_session):
+    response = client.get(f'/api/session/{history_session}/history?since=abc')
+    assert response.status_code == 400
+
+
+def test_compressed_response_revalidates_with_weak_etag(client, history_session):
+    url = f'/api/session/{history_session}/history'
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+    
+    assert client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}).status_code == 304
+    
+    # 새 메시지가 추가되면 버전이 바뀌어 다시 200
+    SessionManager.add_to_history(history_session, 'user', 'new')
+    assert client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}).status_code == 200
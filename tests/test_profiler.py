@@ -0,0 +1,57 @@
+"""프로파일러 라우트별 집계 테스트 (스트리밍 응답, 백그라운드 스레드)"""
+import threading
+import time
+
+import app as app_module
+from app import SamplingProfiler, active_routes
+
+
+def test_streamed_batch_is_attributed_to_route_until_close(client, monkeypatch):
+    request_thread = threading.get_ident()  # 테스트 클라이언트는 같은 스레드에서 응답을 생성
+    seen = []
+    
+    def fake_query(question, history, uploaded_files):
+        # 작업 스레드와, NDJSON을 내보내는 중인 요청 스레드 모두 라우트로 집계되어야 함
+        seen.append((active_routes.get(threading.get_ident()), active_routes.get(request_thread)))
+        return {'output': [{'content': [{'type': 'output_text', 'text': 'a'}]}]}
+    
+    monkeypatch.setattr(app_module.agent_client, 'query', fake_query)
+    response = client.post('/api/chat/batch', json={'items': ['q1', 'q2']})
+    response.get_data()
+    response.close()
+    
+    assert seen == [('/api/chat/batch', '/api/chat/batch')] * 2
+    assert not active_routes
+
+
+def test_agent_stream_thread_is_attributed_to_route(client, monkeypatch):
+    seen = []
+    
+    def fake_query_stream(question, history, uploaded_files, cancel_token=None):
+        seen.append(active_routes.get(threading.get_ident()))
+        yield {'type': 'done'}
+    
+    monkeypatch.setattr(app_module.agent_client, 'query_stream', fake_query_stream)
+    response = client.post('/api/chat/stream', json={'question': 'q'})
+    response.get_data()
+    response.close()
+    assert seen == ['/api/chat/stream']
+
+
+def test_route_mode_samples_batch_worker(client, monkeypatch):
+    def slow_query(question, history, uploaded_files):
+        time.sleep(0.4)
+        return {'output': [{'content': [{'type': 'output_text', 'text': 'a'}]}]}
+    
+    monkeypatch.setattr(app_module.agent_client, 'query', slow_query)
+    profiler = SamplingProfiler(0.01, by_route=True)
+    sampler = threading.Thread(target=profiler.run, args=(0.3,))
+    sampler.start()
+    response = client.post('/api/chat/batch', json={'items': ['q1']})
+    response.get_data()
+    response.close()
+    sampler.join()
+    
+    worker_stacks = [stack for stack in profiler.stacks
+                     if stack.startswith('route:/api/chat/batch;') and 'slow_query' in stack]
+    assert worker_stacks
@@ -0,0 +1,72 @@
+"""백그라운드 스레드로 요청 ID(contextvars)가 전달되는지 테스트"""
+import io
+
+import app as app_module
+from app import request_id_var
+
+
+def test_agent_stream_thread_inherits_request_id(client, monkeypatch):
+    seen = []
+    
+    def fake_query_stream(question, history, uploaded_files, cancel_token=None):
+        seen.append(request_id_var.get())
+        yield {'type': 'response.output_text.delta', 'delta': 'hi'}
+        yield {'type': 'done'}
+    
+    monkeypatch.setattr(app_module.agent_client, 'query_stream', fake_query_stream)
+    response = client.post('/api/chat/stream', json={'question': 'q'}, headers={'X-Request-ID': 'RID-STREAM'})
+    response.get_data()
+    assert seen == ['RID-STREAM']
+
+
+def test_batch_items_inherit_request_id(client, monkeypatch):
+    seen = []
+    
+    def fake_query(question, history, uploaded_files):
+        seen.append(request_id_var.get())
+        return {'output': [{'content': [{'type': 'output_text', 'text': 'a'}]}]}
+    
+    monkeypatch.setattr(app_module.agent_client, 'query', fake_query)
+    response = client.post(
+        '/api/chat/batch', json={'items': ['q1', 'q2', 'q3']}, headers={'X-Request-ID': 'RID-BATCH'}
+    )
+    response.get_data()
+    assert seen == ['RID-BATCH'] * 3
+
+
+def test_batch_upload_workers_inherit_request_id(client, session_id, monkeypatch):
+    seen = []
+    publish = app_module.uploader.publish
+    
+    def recording_publish(*args):
+        seen.append(request_id_var.get())
+        return publish(*args)
+    
+    monkeypatch.setattr(app_module.uploader, 'publish', recording_publish)
+    response = client.post(
+        '/api/upload/batch',
+        data={'session_id': session_id, 'files': [(io.BytesIO(b'a'), 'a.txt'), (io.BytesIO(b'b'), 'b.txt')]},
+        content_type='multipart/form-data',
+        headers={'X-Request-ID': 'RID-UPLOAD'}
+    )
+    assert response.status_code == 200
+    assert seen == ['RID-UPLOAD'] * 2
+
+
+def test_request_id_is_reset_after_response_closes(client, monkeypatch):
+    # 앞선 테스트가 닫지 않은 응답의 요청 ID가 남아 있을 수 있으므로 요청 전 값과 비교
+    before = request_id_var.get()
+    with client.get('/health', headers={'X-Request-ID': 'RID-HEALTH'}) as response:
+        assert response.headers['X-Request-ID'] == 'RID-HEALTH'
+    assert request_id_var.get() == before
+    
+    def fake_query_stream(question, history, uploaded_files, cancel_token=None):
+        yield {'type': 'done'}
+    
+    # 스트리밍 응답은 본문을 모두 보낼 때까지 요청 ID를 유지하고 닫힐 때 되돌림
+    monkeypatch.setattr(app_module.agent_client, 'query_stream', fake_query_stream)
+    response = client.post('/api/chat/stream', json={'question': 'q'}, headers={'X-Request-ID': 'RID-SSE'}, buffered=False)
+    next(response.response)
+    assert request_id_var.get() == 'RID-SSE'
+    response.close()
+    assert request_id_var.get() == before
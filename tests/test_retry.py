@@ -0,0 +1,143 @@
+"""RetryPolicy 테스트 - 로컬 대체 업스트림 서버 사용"""
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app import CancelToken, RetryBudget, RetryPolicy
+
+
+class Upstream:
+    """
+    요청마다 responses에서 (status, headers, body)를 하나씩 꺼내 응답하는 대체 서버
+    (headers에 X-Truncate가 있으면 본문 일부만 보내고 연결을 끊음)
+    """
+    
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+        upstream = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def _respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                upstream.requests.append(self.command)
+                status, headers, body = upstream.responses.pop(0) if upstream.responses else (200, {}, b'ok')
+                truncate = headers.get('X-Truncate')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body) + (1000 if truncate else 0)))
+                self.end_headers()
+                self.wfile.write(body)
+                if truncate:
+                    self.wfile.flush()
+                    self.close_connection = True
+            
+            do_GET = do_POST = do_PUT = _respond
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/invocations'
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_policy(max_attempts=3, base_delay=0.01, max_delay=1.0, tokens=10):
+    return RetryPolicy(
+        max_attempts=max_attempts, base_delay=base_delay, max_delay=max_delay,
+        budget=RetryBudget(ratio=0.0, min_per_sec=0.0, max_tokens=tokens)
+    )
+
+
+@pytest.fixture
+def upstream(request):
+    server = Upstream(getattr(request, 'param', []))
+    yield server
+    server.close()
+
+
+@pytest.mark.parametrize('upstream', [[(504, {}, b'timeout')]], indirect=True)
+def test_504_is_not_retried_for_post(upstream):
+    response = make_policy().request('POST', upstream.url, json={}, timeout=5)
+    assert response.status_code == 504
+    assert upstream.requests == ['POST']
+
+
+@pytest.mark.parametrize('upstream', [[(504, {}, b'timeout')]], indirect=True)
+def test_504_is_retried_for_idempotent_put(upstream):
+    response = make_policy().request('PUT', upstream.url, data=b'file', timeout=5)
+    assert response.status_code == 200
+    assert upstream.requests == ['PUT', 'PUT']
+
+
+@pytest.mark.parametrize('upstream', [[(504, {}, b'timeout')]], indirect=True)
+def test_per_call_retry_statuses(upstream):
+    response = make_policy().request('POST', upstream.url, retry_statuses={504}, timeout=5)
+    assert response.status_code == 200
+    assert upstream.requests == ['POST', 'POST']
+
+
+@pytest.mark.parametrize('upstream', [[(503, {'Retry-After': '0'}, b'busy')]], indirect=True)
+def test_retry_after_seconds_is_honoured(upstream):
+    response = make_policy().request('POST', upstream.url, timeout=5)
+    assert response.status_code == 200
+    assert upstream.requests == ['POST', 'POST']
+
+
+@pytest.mark.parametrize('upstream', [[(429, {'Retry-After': '30'}, b'slow down')]], indirect=True)
+def test_retry_after_beyond_max_delay_is_not_retried(upstream):
+    response = make_policy(max_delay=1.0).request('POST', upstream.url, timeout=5)
+    assert response.status_code == 429
+    assert upstream.requests == ['POST']
+
+
+def test_retry_after_http_date():
+    policy = make_policy()
+    response = requests.Response()
+    response.headers['Retry-After'] = formatdate(time.time() + 3, usegmt=True)
+    assert 1.5 < policy._retry_after(response) <= 3.0
+    response.headers['Retry-After'] = formatdate(time.time() - 60, usegmt=True)
+    assert policy._retry_after(response) == 0.0
+    response.headers['Retry-After'] = 'not-a-date'
+    assert policy._retry_after(response) is None
+
+
+@pytest.mark.parametrize('upstream', [[(503, {}, b'busy'), (503, {}, b'busy')]], indirect=True)
+def test_empty_budget_refuses_retries(upstream):
+    response = make_policy(tokens=0).request('POST', upstream.url, timeout=5)
+    assert response.status_code == 503
+    assert upstream.requests == ['POST']
+
+
+@pytest.mark.parametrize('upstream', [[(503, {'Retry-After': '5'}, b'busy')]], indirect=True)
+def test_cancel_token_interrupts_backoff(upstream):
+    cancel_token = CancelToken()
+    threading.Timer(0.1, cancel_token.cancel).start()
+    started = time.monotonic()
+    with pytest.raises(requests.exceptions.ConnectionError):
+        make_policy(max_delay=10).request('POST', upstream.url, cancel_token=cancel_token, timeout=5)
+    assert time.monotonic() - started < 2
+    assert upstream.requests == ['POST']
+
+
+@pytest.mark.parametrize('upstream', [[(200, {'X-Truncate': '1'}, b'data: {"delta": "a"}\n\n')]], indirect=True)
+def test_stream_is_not_retried_after_first_byte(upstream):
+    response = make_policy().request('POST', upstream.url, stream=True, timeout=5)
+    assert response.status_code == 200
+    with pytest.raises(requests.exceptions.RequestException):
+        for _ in response.iter_lines():
+            pass
+    assert upstream.requests == ['POST']
@@ -0,0 +1,60 @@
+"""세션 저널 순서/재생 테스트"""
+import json
+import threading
+
+import app as app_module
+from app import SessionJournal, SessionManager, chat_sessions
+
+
+def test_concurrent_mutations_replay_without_loss(tmp_path, monkeypatch):
+    journal = SessionJournal(str(tmp_path))
+    monkeypatch.setattr(app_module, 'session_journal', journal)
+    monkeypatch.setattr(app_module.Config, 'MAX_HISTORY_TURNS', 1000)
+    session_id, session = SessionManager.create_session()
+    
+    # 스트림 스레드(메시지)와 요청 스레드(파일)가 같은 세션을 동시에 변경
+    def add_messages():
+        for i in range(300):
+            SessionManager.add_to_history(session_id, 'assistant', f'answer {i}')
+    
+    def add_files():
+        for i in range(300):
+            SessionManager.add_uploaded_file(
+                session_id, {'filename': f'f{i}.txt', 'path': f'/tmp/f{i}.txt', 'size_mb': 0.0}
+            )
+    
+    threads = [threading.Thread(target=add_messages), threading.Thread(target=add_files)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    with open(tmp_path / SessionJournal.JOURNAL_FILE, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    versions = [record['v'] for record in records if record['sid'] == session_id and 'v' in record]
+    assert versions == list(range(1, 601))
+    
+    replayed = {}
+    for record in records:
+        SessionManager.apply_record(replayed, record)
+    assert len(replayed[session_id].history) == 300
+    assert len(replayed[session_id].uploaded_files) == 300
+    assert replayed[session_id].version == session.version
+    chat_sessions.pop(session_id, None)
+
+
+def test_failed_rotation_does_not_break_later_appends(tmp_path, monkeypatch):
+    journal = SessionJournal(str(tmp_path))
+    journal.append({'op': 'c', 'sid': 'before', 't': 0.0})
+    
+    def failing_replace(src, dst):
+        raise OSError('disk full')
+    
+    monkeypatch.setattr(app_module.os, 'replace', failing_replace)
+    journal.compact()  # 오류는 로그만 남김
+    monkeypatch.undo()
+    
+    journal.append({'op': 'c', 'sid': 'after', 't': 1.0})
+    with open(tmp_path / SessionJournal.JOURNAL_FILE, encoding='utf-8') as f:
+        sids = [json.loads(line)['sid'] for line in f]
+    assert sids == ['before', 'after']
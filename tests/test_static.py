@@ -0,0 +1,55 @@
+"""정적 자산 지문 URL / 메인 페이지 ETag 테스트"""
+import re
+
+import app as app_module
+
+
+def _stylesheet_url(client):
+    return re.search(r'href="(/static/css/style\.[0-9a-f]{12}\.css)"', client.get('/').get_data(as_text=True)).group(1)
+
+
+def test_index_links_fingerprinted_asset_with_immutable_cache(client):
+    url = _stylesheet_url(client)
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert response.data == (app_module.STATIC_DIR / 'css' / 'style.css').read_bytes()
+
+
+def test_unfingerprinted_path_is_revalidated(client):
+    response = client.get('/static/css/style.css')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    
+    revalidated = client.get('/static/css/style.css', headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_index_returns_304_for_matching_etag(client):
+    for headers in ({}, {'Accept-Encoding': 'gzip'}):
+        first = client.get('/', headers=headers)
+        assert first.status_code == 200
+        assert first.headers['Cache-Control'] == 'no-cache'
+        
+        second = client.get('/', headers={**headers, 'If-None-Match': first.headers['ETag']})
+        assert second.status_code == 304
+        assert second.data == b''
+        assert second.headers['ETag'] == first.headers['ETag']
+
+
+def test_debug_mode_serves_edited_files_from_disk(client, monkeypatch, tmp_path):
+    hashed_url = _stylesheet_url(client)
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'style.css').write_text('body { color: red; }')
+    monkeypatch.setattr(app_module, 'STATIC_DIR', tmp_path)
+    monkeypatch.setattr(app_module.app, 'debug', True)
+    
+    assert 'href="/static/css/style.css"' in client.get('/').get_data(as_text=True)
+    for url in ('/static/css/style.css', hashed_url):
+        response = client.get(url)
+        assert response.data == b'body { color: red; }'
+        assert 'immutable' not in response.headers['Cache-Control']
+        response.close()
+    
+    monkeypatch.setattr(app_module.app, 'debug', False)
+    assert _stylesheet_url(client) == hashed_url
@@ -0,0 +1,44 @@
+"""/api/upload/batch 테스트 (로컬 모드)"""
+import io
+
+from app import Config, chat_sessions
+
+
+def _files(count, size):
+    return [(io.BytesIO(b'x' * size), f'doc{i}.txt') for i in range(count)]
+
+
+def test_batch_over_single_file_limit_is_accepted(client, session_id):
+    # 파일 3개 x 5MB = 15MB: 파일당 한도(10MB)보다 큰 요청도 합계 한도 안이면 처리
+    response = client.post(
+        '/api/upload/batch',
+        data={'session_id': session_id, 'files': _files(3, 5 * 1024 * 1024)},
+        content_type='multipart/form-data'
+    )
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['succeeded'] == 3
+    assert len(chat_sessions[session_id].uploaded_files) == 3
+
+
+def test_batch_over_total_limit_returns_json_413(client, session_id):
+    size = (Config.UPLOAD_MAX_TOTAL_MB // 5 + 1) * 5 * 1024 * 1024
+    response = client.post(
+        '/api/upload/batch',
+        data={'session_id': session_id, 'files': _files(size // (5 * 1024 * 1024), 5 * 1024 * 1024)},
+        content_type='multipart/form-data'
+    )
+    assert response.status_code == 413
+    assert 'error' in response.get_json()
+
+
+def test_batch_validation_failure_uploads_nothing(client, session_id):
+    files = _files(2, 10) + [(io.BytesIO(b'z'), 'evil.exe')]
+    response = client.post(
+        '/api/upload/batch',
+        data={'session_id': session_id, 'files': files},
+        content_type='multipart/form-data'
+    )
+    assert response.status_code == 400
+    assert 'evil.exe' in response.get_json()['error']
+    assert not chat_sessions[session_id].uploaded_files